@@ -27,6 +27,26 @@ def create_app(config_class=Config):
     db.init_app(app)
     migrate.init_app(app, db)
     
+    # Настройка кэшей отчетов и прав старост
+    from app.utils.cache import report_cache, group_admin_cache
+    report_cache.configure(app.config['REPORT_CACHE_SIZE'], app.config['REPORT_CACHE_TTL'])
+    group_admin_cache.configure(app.config['GROUP_ADMIN_CACHE_SIZE'], app.config['GROUP_ADMIN_CACHE_TTL'])
+    
+    # Ограничение одновременного хеширования паролей
+    from app.utils import passwords
+    passwords.configure(app.config['PASSWORD_HASH_CONCURRENCY'], app.config['PASSWORD_HASH_TIMEOUT'])
+    
+    # Ограничение частоты запросов к входу и тяжелым страницам
+    from app.utils import rate_limit
+    rate_limit.init_app(app)
+    
+    # Полнотекстовый индекс пользователей создается вместе с таблицами
+    from app.utils import user_search
+    
+    # Группа и признак старосты в сессии студента следуют за изменениями в базе
+    from app.utils.decorators import refresh_student_session
+    app.before_request(refresh_student_session)
+    
     # Инициализация специфичных настроек для конфигурации
     if hasattr(config_class, 'init_app'):
         config_class.init_app(app)
@@ -53,11 +73,15 @@ def create_app(config_class=Config):
     from app.routes.lessons import bp as lessons_bp
     app.register_blueprint(lessons_bp, url_prefix='/lessons')
     
+    from app.routes.semesters import bp as semesters_bp
+    app.register_blueprint(semesters_bp, url_prefix='/semesters')
+    
     from app.routes.attendance import bp as attendance_bp
     app.register_blueprint(attendance_bp, url_prefix='/attendance')
     
     # Регистрация моделей (для Flask-Migrate)
-    from app.models import user, group, student, subject, lesson, attendance
+    from app.models import user, group, student, subject, lesson, attendance, attendance_daily, at_risk_student, at_risk_queue, \
+        semester, lesson_occurrence, schedule_version
     
     @app.context_processor
     def utility_processor():
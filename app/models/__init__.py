@@ -7,4 +7,10 @@ from app.models.group import Group
 from app.models.student import Student
 from app.models.subject import Subject
 from app.models.lesson import Lesson
-from app.models.attendance import Attendance 
\ No newline at end of file
+from app.models.attendance import Attendance
+from app.models.attendance_daily import AttendanceDaily
+from app.models.at_risk_student import AtRiskStudent
+from app.models.at_risk_queue import AtRiskQueue
+from app.models.semester import Semester
+from app.models.lesson_occurrence import LessonOccurrence
+from app.models.schedule_version import ScheduleVersion
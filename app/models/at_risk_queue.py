@@ -0,0 +1,29 @@
+"""
+Модель очереди пересчета группы риска.
+"""
+from app import db
+
+
+class AtRiskQueue(db.Model):
+    """
+    Журнал студентов, посещаемость которых изменилась после последнего
+    пересчета группы риска.
+    
+    Записи добавляются вместе с обновлением дневной сводки и удаляются
+    фоновым пересчетом. Повторы допустимы: пересчет обрабатывает каждого
+    студента один раз.
+    
+    Attributes:
+        id (int): Порядковый номер записи
+        student_id (int): Идентификатор студента
+    """
+    __tablename__ = "at_risk_queue"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, nullable=False, index=True)
+    
+    def __repr__(self):
+        """
+        Строковое представление объекта.
+        """
+        return f"<AtRiskQueue {self.id} student={self.student_id}>"
@@ -0,0 +1,41 @@
+"""
+Модель студентов группы риска.
+"""
+from app import db
+from datetime import datetime
+
+
+class AtRiskStudent(db.Model):
+    """
+    Студент, посещаемость которого в текущем семестре требует внимания куратора.
+    
+    Таблица заполняется фоновым пересчетом (см. app.utils.at_risk) и хранит
+    только студентов группы риска, поэтому список читается за время,
+    пропорциональное размеру результата.
+    
+    Attributes:
+        student_id (int): Идентификатор студента
+        semester_id (int): Идентификатор семестра, за который посчитаны показатели
+        total (int): Всего отметок за семестр
+        presents (int): Количество присутствий за семестр
+        presence_rate (float): Процент присутствия
+        absence_streak (int): Количество пропусков подряд на момент пересчета
+        updated_at (datetime): Время пересчета
+    """
+    __tablename__ = "at_risk_students"
+    
+    student_id = db.Column(db.Integer, db.ForeignKey("students.id"), primary_key=True)
+    semester_id = db.Column(db.Integer, db.ForeignKey("semesters.id"), nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    presents = db.Column(db.Integer, nullable=False, default=0)
+    presence_rate = db.Column(db.Float, nullable=False, index=True)
+    absence_streak = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    # student присваивается через backref в модели Student
+    
+    def __repr__(self):
+        """
+        Строковое представление объекта.
+        """
+        return f"<AtRiskStudent student={self.student_id} rate={self.presence_rate}>"
@@ -25,8 +25,13 @@ class Attendance(db.Model):
     status = db.Column(db.String(10))
     
     # Добавляем уникальное ограничение для предотвращения дубликатов
+    # и индексы под выборки журнала и отчета по диапазону дат
     __table_args__ = (
         db.UniqueConstraint('student_id', 'lesson_id', 'date', name='uix_attendance_student_lesson_date'),
+        db.Index('ix_attendance_date_student', 'date', 'student_id'),
+        db.Index('ix_attendance_lesson_date', 'lesson_id', 'date'),
+        # Серия пропусков группы риска и пересчет сводки по студентам (см. scripts/check_indexes.py)
+        db.Index('ix_attendance_student_date_status', 'student_id', 'date', 'status'),
     )
     
     # Связи с другими таблицами через backref
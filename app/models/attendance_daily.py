@@ -0,0 +1,40 @@
+"""
+Модель дневной сводки посещаемости.
+"""
+from app import db
+
+
+class AttendanceDaily(db.Model):
+    """
+    Сводка посещаемости за день по студенту и предмету.
+    
+    Поддерживается в актуальном состоянии при каждой записи в attendance
+    (см. app.utils.rollup) и используется отчетами вместо агрегации
+    исходных записей.
+    
+    Attributes:
+        student_id (int): Идентификатор студента
+        date (datetime.date): Дата занятий
+        subject_id (int): Идентификатор предмета
+        total (int): Всего отметок
+        present (int): Количество присутствий
+        absent (int): Количество пропусков
+        late (int): Количество опозданий
+        sick (int): Количество пропусков по болезни
+    """
+    __tablename__ = "attendance_daily"
+    
+    student_id = db.Column(db.Integer, db.ForeignKey("students.id"), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id"), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    present = db.Column(db.Integer, nullable=False, default=0)
+    absent = db.Column(db.Integer, nullable=False, default=0)
+    late = db.Column(db.Integer, nullable=False, default=0)
+    sick = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        """
+        Строковое представление объекта.
+        """
+        return f"<AttendanceDaily student={self.student_id} subject={self.subject_id} at {self.date}>"
@@ -20,8 +20,8 @@ class Lesson(db.Model):
     __tablename__ = "lessons"
     
     id = db.Column(db.Integer, primary_key=True)
-    subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id"), nullable=False)
-    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id"), nullable=False, index=True)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False, index=True)
     lesson_type = db.Column(db.String(10))
     week_type = db.Column(db.String(5))
     day_of_week = db.Column(db.String(10))
@@ -0,0 +1,39 @@
+"""
+Модель проведения занятия в конкретную дату.
+"""
+from app import db
+
+
+class LessonOccurrence(db.Model):
+    """
+    Дата, в которую проводится занятие по расписанию.
+    
+    Таблица генерируется из недельного расписания и календаря семестров
+    (см. app.utils.occurrences) и пересчитывается при изменении занятий
+    и семестров.
+    
+    Attributes:
+        lesson_id (int): Идентификатор занятия
+        date (datetime.date): Дата проведения
+        group_id (int): Идентификатор группы занятия
+        semester_id (int): Идентификатор семестра
+        lesson_number (int): Номер пары
+    """
+    __tablename__ = "lesson_occurrences"
+    
+    lesson_id = db.Column(db.Integer, db.ForeignKey("lessons.id"), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
+    semester_id = db.Column(db.Integer, db.ForeignKey("semesters.id"), nullable=False, index=True)
+    lesson_number = db.Column(db.Integer, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_lesson_occurrences_date_group', 'date', 'group_id'),
+        db.Index('ix_lesson_occurrences_group_date', 'group_id', 'date'),
+    )
+    
+    def __repr__(self):
+        """
+        Строковое представление объекта.
+        """
+        return f"<LessonOccurrence lesson={self.lesson_id} at {self.date}>"
@@ -0,0 +1,31 @@
+"""
+Модель версии расписания группы.
+"""
+from app import db
+from datetime import datetime
+
+
+class ScheduleVersion(db.Model):
+    """
+    Счетчик изменений расписания группы.
+    
+    Увеличивается в той же транзакции, что и изменение занятий, семестров,
+    предметов или групп, поэтому одинаков для всех процессов сервера.
+    По нему строятся ETag и Last-Modified календарных лент.
+    
+    Attributes:
+        group_id (int): Идентификатор группы
+        version (int): Номер версии расписания
+        updated_at (datetime): Время последнего изменения (UTC)
+    """
+    __tablename__ = "schedule_versions"
+    
+    group_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        """
+        Строковое представление объекта.
+        """
+        return f"<ScheduleVersion group={self.group_id} v{self.version}>"
@@ -0,0 +1,98 @@
+"""
+Модель учебного семестра.
+"""
+from app import db
+from datetime import datetime, timedelta
+
+
+class Semester(db.Model):
+    """
+    Модель учебного семестра - календаря, по которому недельное
+    расписание разворачивается в конкретные даты занятий.
+    
+    Attributes:
+        id (int): Уникальный идентификатор семестра
+        name (str): Название семестра
+        start_date (datetime.date): Первый день семестра
+        end_date (datetime.date): Последний день семестра
+        first_week_type (str): Тип первой недели семестра (Чет или Нечет)
+    """
+    __tablename__ = "semesters"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    first_week_type = db.Column(db.String(5), nullable=False, default="Нечет")
+    
+    def __init__(self, name, start_date, end_date, first_week_type="Нечет"):
+        """
+        Инициализация семестра.
+        
+        Args:
+            name (str): Название семестра
+            start_date (datetime.date): Первый день семестра
+            end_date (datetime.date): Последний день семестра
+            first_week_type (str, optional): Тип первой недели (Чет или Нечет)
+        """
+        self.name = name
+        self.start_date = start_date
+        self.end_date = end_date
+        self.first_week_type = first_week_type
+    
+    def week_type(self, date):
+        """
+        Возвращает тип недели (Чет или Нечет), в которую попадает дата.
+        
+        Args:
+            date (datetime.date): Дата внутри семестра
+            
+        Returns:
+            str: Тип недели
+        """
+        first_monday = self.start_date - timedelta(days=self.start_date.weekday())
+        week_index = (date - first_monday).days // 7
+        if week_index % 2 == 0:
+            return self.first_week_type
+        return "Чет" if self.first_week_type == "Нечет" else "Нечет"
+    
+    @classmethod
+    def overlapping(cls, start_date, end_date, exclude_id=None):
+        """
+        Запрос семестров, пересекающихся с периодом.
+        
+        Args:
+            start_date (datetime.date): Начало периода
+            end_date (datetime.date): Конец периода
+            exclude_id (int, optional): Семестр, который не учитывается
+        
+        Returns:
+            Query: Запрос семестров
+        """
+        query = cls.query.filter(cls.start_date <= end_date, cls.end_date >= start_date)
+        if exclude_id is not None:
+            query = query.filter(cls.id != exclude_id)
+        return query
+    
+    @classmethod
+    def current(cls, date=None):
+        """
+        Возвращает семестр, в который попадает дата.
+        
+        Семестры не пересекаются (см. overlapping), поэтому такой семестр
+        не больше одного.
+        
+        Args:
+            date (datetime.date, optional): Дата (по умолчанию сегодня)
+        
+        Returns:
+            Semester или None, если дата вне семестров
+        """
+        date = date or datetime.now().date()
+        return cls.query.filter(cls.start_date <= date, cls.end_date >= date).first()
+    
+    def __repr__(self):
+        """
+        Строковое представление объекта.
+        """
+        return f"<Semester {self.name}>"
@@ -17,13 +17,14 @@ class Student(db.Model):
     __tablename__ = "students"
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False, index=True)
     is_group_admin = db.Column(db.Boolean, default=False)
     
     # Связи с другими таблицами через backref
     # user и group присваиваются через backref в их моделях
     attendances = db.relationship("Attendance", backref="student", cascade="all, delete-orphan")
+    at_risk = db.relationship("AtRiskStudent", backref="student", uselist=False, cascade="all, delete-orphan")
     
     def __init__(self, user_id, group_id, is_group_admin=False):
         """
@@ -2,7 +2,7 @@
 Модель пользователя системы.
 """
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.passwords import hash_password, verify_password, needs_rehash
 
 
 class User(db.Model):
@@ -41,7 +41,7 @@ class User(db.Model):
             last_name (str, optional): Фамилия пользователя
         """
         self.username = username
-        self.password = generate_password_hash(password)
+        self.password = hash_password(password)
         self.role = role
         self.first_name = first_name
         self.last_name = last_name
@@ -56,7 +56,26 @@ class User(db.Model):
         Returns:
             bool: True если пароль верный, иначе False
         """
-        return check_password_hash(self.password, password)
+        return verify_password(self.password, password)
+    
+    def set_password(self, password):
+        """
+        Устанавливает новый пароль, хешируя его по текущей политике.
+        
+        Args:
+            password (str): Новый пароль
+        """
+        self.password = hash_password(password)
+    
+    @property
+    def password_needs_rehash(self):
+        """
+        Проверяет, посчитан ли хеш пароля по устаревшей политике.
+        
+        Returns:
+            bool: True если хеш нужно пересчитать при следующем входе
+        """
+        return needs_rehash(self.password)
     
     @property
     def full_name(self):
@@ -1,28 +1,149 @@
 """
 Маршруты для управления посещаемостью.
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from sqlalchemy import text
+import csv
+import functools
+import io
+import tempfile
+import time
+import click
+from flask import (Blueprint, render_template, request, redirect, url_for, flash, session, current_app,
+                   Response, stream_with_context, send_file, jsonify)
+from sqlalchemy import select, func, or_, and_, bindparam, true, cast, literal_column, Date, Float
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
 from app import db
 from app.models.attendance import Attendance
+from app.models.attendance_daily import AttendanceDaily
+from app.models.at_risk_student import AtRiskStudent
 from app.models.lesson import Lesson
+from app.models.lesson_occurrence import LessonOccurrence
+from app.models.semester import Semester
 from app.models.student import Student
 from app.models.group import Group
 from app.models.subject import Subject
+from app.models.user import User
 from app.utils.decorators import login_required, admin_required, admin_or_group_admin_required
+from app.utils.helpers import encode_cursor, decode_cursor
+from app.utils.rollup import refresh_rollup, rebuild_rollup
+from app.utils.at_risk import refresh_at_risk
+from app.utils.cache import report_cache, report_generation
 
 # Создаем Blueprint
 bp = Blueprint('attendance', __name__)
 
-@bp.route('/')
-@login_required
-def list():
+# Столбцы и размер порции для экспорта журнала
+EXPORT_COLUMNS = ["Дата", "Студент", "Группа", "Предмет", "Тип занятия", "Статус"]
+EXPORT_CHUNK_SIZE = 1000
+
+
+def _journal_query(start_date, end_date):
     """
-    Список посещаемости с фильтрацией по дате, группе, студенту и предмету.
+    Базовый запрос журнала посещаемости за период.
+    
+    Выбирает только отображаемые в журнале поля (имя студента, группу,
+    предмет, тип занятия и статус) одним запросом с JOIN, поэтому
+    количество запросов к базе не зависит от числа строк.
     
+    Args:
+        start_date (datetime.date): Начальная дата
+        end_date (datetime.date): Конечная дата
+        
     Returns:
-        str: Отрендеренный шаблон списка посещаемости
+        sqlalchemy.orm.Query: Запрос, возвращающий строки журнала
+    """
+    return db.session.query(
+        Attendance.id,
+        Attendance.date,
+        Attendance.status,
+        Attendance.lesson_id,
+        Attendance.student_id,
+        User.first_name,
+        User.last_name,
+        Group.name.label("group_name"),
+        Subject.name.label("subject_name"),
+        Lesson.lesson_type
+    ).join(
+        Student, Attendance.student_id == Student.id
+    ).join(
+        User, Student.user_id == User.id
+    ).join(
+        Group, Student.group_id == Group.id
+    ).join(
+        Lesson, Attendance.lesson_id == Lesson.id
+    ).join(
+        Subject, Lesson.subject_id == Subject.id
+    ).filter(
+        Attendance.date >= start_date,
+        Attendance.date <= end_date
+    )
+
+
+def _paginate_journal(query, per_page, after=None, before=None):
+    """
+    Постраничная выборка журнала по курсору (keyset-пагинация).
+    
+    Записи упорядочены по (date desc, lesson_id, id). Вместо OFFSET
+    используется условие на позицию последней показанной записи, поэтому
+    любая страница стоит столько же, сколько первая.
+    
+    Args:
+        query (sqlalchemy.orm.Query): Запрос журнала с примененными фильтрами
+        per_page (int): Количество записей на странице
+        after (tuple, optional): Позиция (date, lesson_id, id), после которой начинается страница
+        before (tuple, optional): Позиция (date, lesson_id, id), до которой заканчивается страница
+        
+    Returns:
+        tuple: (записи страницы, курсор следующей страницы, курсор предыдущей страницы)
+    """
+    if before:
+        date, lesson_id, record_id = before
+        query = query.filter(or_(
+            Attendance.date > date,
+            and_(Attendance.date == date, Attendance.lesson_id < lesson_id),
+            and_(Attendance.date == date, Attendance.lesson_id == lesson_id, Attendance.id < record_id)
+        ))
+        # Идем в обратном порядке от курсора и разворачиваем результат
+        records = query.order_by(
+            Attendance.date.asc(), Attendance.lesson_id.desc(), Attendance.id.desc()
+        ).limit(per_page + 1).all()
+        has_prev = len(records) > per_page
+        records = records[:per_page][::-1]
+        has_next = True
+    else:
+        if after:
+            date, lesson_id, record_id = after
+            query = query.filter(or_(
+                Attendance.date < date,
+                and_(Attendance.date == date, Attendance.lesson_id > lesson_id),
+                and_(Attendance.date == date, Attendance.lesson_id == lesson_id, Attendance.id > record_id)
+            ))
+        records = query.order_by(
+            Attendance.date.desc(), Attendance.lesson_id, Attendance.id
+        ).limit(per_page + 1).all()
+        has_next = len(records) > per_page
+        records = records[:per_page]
+        has_prev = after is not None
+    
+    next_cursor = prev_cursor = None
+    if records:
+        if has_next:
+            last = records[-1]
+            next_cursor = encode_cursor(last.date, last.lesson_id, last.id)
+        if has_prev:
+            first = records[0]
+            prev_cursor = encode_cursor(first.date, first.lesson_id, first.id)
+    return records, next_cursor, prev_cursor
+
+
+def _filtered_journal_query():
+    """
+    Строит запрос журнала по параметрам текущего запроса и роли пользователя.
+    
+    Используется журналом и экспортом, чтобы они применяли одинаковые фильтры.
+    
+    Returns:
+        tuple: (запрос журнала, словарь примененных фильтров)
     """
     # Получаем параметры фильтрации
     start_date = request.args.get("start_date", (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d"))
@@ -35,69 +156,95 @@ def list():
     start_date_obj = datetime.strptime(start_date, "%Y-%m-%d").date()
     end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
     
-    # Базовый запрос
-    query = Attendance.query.filter(
-        Attendance.date >= start_date_obj,
-        Attendance.date <= end_date_obj
-    )
+    # Базовый запрос: все отображаемые поля одним JOIN-запросом
+    query = _journal_query(start_date_obj, end_date_obj)
     
-    # Фильтрация в зависимости от роли пользователя
+    # Фильтры по группе и предмету применяются к уже присоединенным таблицам
+    # students и lessons, поэтому каждая комбинация фильтров - один запрос
     user_role = session.get('user_role')
     
     # Для обычного студента показываем только его посещаемость
     if user_role == 'student' and not session.get('is_group_admin', False):
         student_id = session.get('student_id')
-        query = query.filter_by(student_id=student_id)
+        query = query.filter(Attendance.student_id == student_id)
         
-    # Для старосты группы показываем посещаемость его группы
+    # Для старосты группы показываем посещаемость только его группы
     elif user_role == 'student' and session.get('is_group_admin', False):
-        if not group_id:  # Если группа не задана явно в фильтрах, используем группу старосты
-            group_id = session.get('group_id')
-            
-        student_ids = [s.id for s in Student.query.filter_by(group_id=group_id).all()]
-        query = query.filter(Attendance.student_id.in_(student_ids))
+        group_id = session.get('group_id')
+        query = query.filter(Student.group_id == group_id)
+        if student_id:
+            query = query.filter(Attendance.student_id == student_id)
         
     # Для администратора доступны все записи, применяем фильтры если они указаны
     else:  # admin
-        # Фильтрация по группе, если выбрана
         if group_id:
-            if not student_id:
-                # Только по группе - получаем всех студентов группы
-                student_ids = [student.id for student in Student.query.filter_by(group_id=group_id).all()]
-                query = query.filter(Attendance.student_id.in_(student_ids))
-        
-    # Фильтрация по студенту, если выбран и пользователь имеет право
-    if student_id and (user_role == 'admin' or 
-                     (user_role == 'student' and session.get('is_group_admin') and 
-                      Student.query.get(student_id).group_id == session.get('group_id'))):
-        query = query.filter_by(student_id=student_id)
+            query = query.filter(Student.group_id == group_id)
+        if student_id:
+            query = query.filter(Attendance.student_id == student_id)
     
     # Фильтрация по предмету, если выбран
     if subject_id:
-        # Получаем все занятия по данному предмету
-        lesson_ids = [lesson.id for lesson in Lesson.query.filter_by(subject_id=subject_id).all()]
-        if lesson_ids:
-            query = query.filter(Attendance.lesson_id.in_(lesson_ids))
+        query = query.filter(Lesson.subject_id == subject_id)
+    
+    filters = dict(
+        start_date=start_date,
+        end_date=end_date,
+        group_id=group_id,
+        student_id=student_id,
+        subject_id=subject_id
+    )
+    return query, filters
+
+
+@bp.route('/')
+@login_required
+def list():
+    """
+    Список посещаемости с фильтрацией по дате, группе, студенту и предмету.
+    
+    Returns:
+        str: Отрендеренный шаблон списка посещаемости
+    """
+    query, filters = _filtered_journal_query()
+    start_date = filters["start_date"]
+    end_date = filters["end_date"]
+    group_id = filters["group_id"]
+    student_id = filters["student_id"]
+    subject_id = filters["subject_id"]
+    user_role = session.get('user_role')
     
-    # Выполняем запрос
-    attendance_records = query.order_by(Attendance.date.desc(), Attendance.lesson_id).all()
+    # Выполняем запрос постранично
+    attendance_records, next_cursor, prev_cursor = _paginate_journal(
+        query,
+        current_app.config['ITEMS_PER_PAGE'],
+        after=decode_cursor(request.args.get("after")),
+        before=decode_cursor(request.args.get("before"))
+    )
+    
+    # Параметры фильтров, сохраняемые в ссылках на соседние страницы
+    filter_args = {
+        key: value for key, value in request.args.items()
+        if key not in ("after", "before")
+    }
     
     # Получаем списки для фильтров в зависимости от роли
+    # (пользователи студентов подгружаются сразу, чтобы не было запроса на каждую строку)
+    students_query = Student.query.options(joinedload(Student.user))
     if user_role == 'admin':
         groups = Group.query.all()
         # Если выбрана группа, отображаем только студентов этой группы
         if group_id:
-            students = Student.query.filter_by(group_id=group_id).all()
+            students = students_query.filter_by(group_id=group_id).all()
         else:
-            students = Student.query.all()
+            students = students_query.all()
     elif user_role == 'student' and session.get('is_group_admin'):
         # Староста видит только свою группу
         groups = [Group.query.get(session.get('group_id'))]
-        students = Student.query.filter_by(group_id=session.get('group_id')).all()
+        students = students_query.filter_by(group_id=session.get('group_id')).all()
     else:
         # Обычный студент видит только себя
         groups = [Group.query.get(session.get('group_id'))]
-        students = [Student.query.get(session.get('student_id'))]
+        students = [students_query.get(session.get('student_id'))]
     
     subjects = Subject.query.all()
     
@@ -115,10 +262,129 @@ def list():
         groups=groups,
         students=students,
         subjects=subjects,
-        can_edit=can_edit
+        can_edit=can_edit,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        filter_args=filter_args
+    )
+
+
+def _export_rows(query):
+    """
+    Генератор строк экспорта журнала.
+    
+    Записи читаются с сервера порциями по EXPORT_CHUNK_SIZE (yield_per
+    включает серверный курсор), поэтому в памяти не держится весь результат.
+    
+    Args:
+        query (sqlalchemy.orm.Query): Запрос журнала с примененными фильтрами
+        
+    Yields:
+        list: Значения столбцов EXPORT_COLUMNS для одной записи
+    """
+    query = query.order_by(
+        Attendance.date.desc(), Attendance.lesson_id, Attendance.id
+    ).yield_per(EXPORT_CHUNK_SIZE)
+    
+    for row in query:
+        yield [
+            row.date.strftime("%d.%m.%Y"),
+            f"{row.first_name or ''} {row.last_name or ''}".strip(),
+            row.group_name,
+            row.subject_name,
+            row.lesson_type,
+            Attendance.STATUS_LABELS.get(row.status, row.status)
+        ]
+
+
+def _csv_response(rows, filename):
+    """
+    Потоковый CSV-ответ: данные отправляются клиенту порциями по мере чтения из базы.
+    
+    Args:
+        rows (iterable): Строки для экспорта
+        filename (str): Имя файла без расширения
+        
+    Returns:
+        Response: Потоковый HTTP-ответ
+    """
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        
+        # BOM нужен, чтобы Excel правильно определил кодировку UTF-8
+        buffer.write("\ufeff")
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+        
+        buffer.seek(0)
+        buffer.truncate(0)
+        for number, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if number % EXPORT_CHUNK_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}.csv"}
+    )
+
+
+def _xlsx_response(rows, filename):
+    """
+    XLSX-ответ, собранный в режиме write_only.
+    
+    В режиме write_only openpyxl не хранит лист в памяти, а готовый файл
+    пишется во временный файл на диске и отдается клиенту потоком.
+    
+    Args:
+        rows (iterable): Строки для экспорта
+        filename (str): Имя файла без расширения
+        
+    Returns:
+        Response: HTTP-ответ с файлом
+    """
+    from openpyxl import Workbook
+    
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Посещаемость")
+    sheet.append(EXPORT_COLUMNS)
+    for row in rows:
+        sheet.append(row)
+    
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    
+    return send_file(
+        output,
+        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        as_attachment=True,
+        download_name=f"{filename}.xlsx"
     )
 
 
+@bp.route('/export')
+@login_required
+def export():
+    """
+    Экспорт журнала посещаемости в CSV или XLSX с теми же фильтрами, что и в журнале.
+    
+    Returns:
+        Response: Файл с записями посещаемости
+    """
+    query, filters = _filtered_journal_query()
+    filename = f"attendance_{filters['start_date']}_{filters['end_date']}"
+    
+    if request.args.get("format") == "xlsx":
+        return _xlsx_response(_export_rows(query), filename)
+    return _csv_response(_export_rows(query), filename)
+
+
 @bp.route('/create', methods=["GET", "POST"])
 @admin_or_group_admin_required
 def create(group_admin_group_id=None):
@@ -147,13 +413,18 @@ def create(group_admin_group_id=None):
                 flash("Вы можете добавлять посещаемость только для занятий вашей группы", "danger")
                 return redirect(url_for('attendance.list'))
                 
+        date = datetime.strptime(request.form["date"], "%Y-%m-%d").date()
         attendance = Attendance(
             lesson_id=lesson_id,
             student_id=student_id,
-            date=datetime.strptime(request.form["date"], "%Y-%m-%d"),
+            date=date,
             status=request.form["status"]
         )
         db.session.add(attendance)
+        
+        # Обновляем дневную сводку для этого студента и предмета
+        lesson = Lesson.query.get(lesson_id)
+        refresh_rollup(date=date, student_ids=[student_id], subject_id=lesson.subject_id)
         db.session.commit()
         flash("Посещаемость добавлена", "success")
         return redirect(url_for('attendance.list'))
@@ -182,6 +453,56 @@ def create(group_admin_group_id=None):
     )
 
 
+def _upsert_attendance(rows):
+    """
+    Вставляет или обновляет записи посещаемости одним запросом.
+    
+    Конфликт определяется по ограничению uix_attendance_student_lesson_date
+    (student_id, lesson_id, date): для существующих записей обновляется статус.
+    
+    Args:
+        rows (list): Словари с ключами student_id, lesson_id, date, status
+    """
+    if not rows:
+        return
+    
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(Attendance).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uix_attendance_student_lesson_date",
+            set_={"status": stmt.excluded.status}
+        )
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(Attendance).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["student_id", "lesson_id", "date"],
+            set_={"status": stmt.excluded.status}
+        )
+    elif dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(Attendance).values(rows)
+        stmt = stmt.on_duplicate_key_update(status=stmt.inserted.status)
+    else:
+        # Для остальных СУБД: один запрос на чтение существующих записей и пакетная запись
+        keys = {(row["student_id"], row["lesson_id"], row["date"]): row for row in rows}
+        existing = Attendance.query.filter(
+            Attendance.student_id.in_({key[0] for key in keys}),
+            Attendance.lesson_id.in_({key[1] for key in keys}),
+            Attendance.date.in_({key[2] for key in keys})
+        ).all()
+        for record in existing:
+            row = keys.pop((record.student_id, record.lesson_id, record.date), None)
+            if row:
+                record.status = row["status"]
+        db.session.add_all(Attendance(**row) for row in keys.values())
+        return
+    
+    db.session.execute(stmt)
+
+
 @bp.route('/bulk', methods=["GET", "POST"])
 @admin_or_group_admin_required
 def bulk(group_admin_group_id=None):
@@ -206,57 +527,35 @@ def bulk(group_admin_group_id=None):
                 flash("Вы можете добавлять посещаемость только для занятий вашей группы", "danger")
                 return redirect(url_for('attendance.bulk'))
         
-        student_statuses = {}
-        
         # Получаем все ID студентов и их статусы
+        student_statuses = {}
         for key, value in request.form.items():
             if key.startswith("student_"):
-                student_id = int(key.split("_")[1])
-                
-                # Дополнительная проверка для старост
-                if session.get('user_role') == 'student' and session.get('is_group_admin'):
-                    student = Student.query.get(student_id)
-                    # Используем group_admin_group_id вместо session.get('group_id')
-                    if student.group_id != group_admin_group_id:
-                        continue  # Пропускаем студентов не из своей группы
-                        
-                student_statuses[student_id] = value
+                student_statuses[int(key.split("_")[1])] = value
         
-        # Проверяем существующие записи и обновляем или добавляем
-        for student_id, status in student_statuses.items():
-            # Проверка, что student_id существует и не None
-            if student_id is None:
-                continue
-                
-            # Находим все существующие записи для этого студента, урока и даты (могут быть дубликаты)
-            existing_records = Attendance.query.filter_by(
-                student_id=student_id,
-                lesson_id=lesson_id,
-                date=date
-            ).all()
-            
-            if existing_records:
-                # Если есть дубликаты, удаляем все кроме первой записи
-                if len(existing_records) > 1:
-                    print(f"Найдено {len(existing_records)} дубликатов для студента {student_id} на {date}")
-                    # Оставляем только первую запись
-                    for record in existing_records[1:]:
-                        print(f"Удаляем дубликат: ID={record.id}")
-                        db.session.delete(record)
-                
-                # Обновляем первую запись
-                existing_records[0].status = status
-                print(f"Обновляем запись: ID={existing_records[0].id}, студент={student_id}, статус={status}")
-            else:
-                # Создаем новую запись
-                attendance = Attendance(
-                    lesson_id=lesson_id,
-                    student_id=student_id,
-                    date=date,
-                    status=status
+        # Для старост оставляем только студентов своей группы (один запрос на всех)
+        if student_statuses and session.get('user_role') == 'student' and session.get('is_group_admin'):
+            allowed_ids = {
+                row.id for row in db.session.query(Student.id).filter(
+                    Student.id.in_(student_statuses.keys()),
+                    Student.group_id == group_admin_group_id
                 )
-                print(f"Создаем новую запись: студент={student_id}, статус={status}")
-                db.session.add(attendance)
+            }
+            student_statuses = {
+                student_id: status for student_id, status in student_statuses.items()
+                if student_id in allowed_ids
+            }
+        
+        # Сохраняем все статусы одним запросом
+        _upsert_attendance([
+            dict(student_id=student_id, lesson_id=lesson_id, date=date, status=status)
+            for student_id, status in student_statuses.items()
+        ])
+        
+        # Обновляем дневную сводку для отмеченных студентов
+        if student_statuses:
+            lesson = Lesson.query.get(lesson_id)
+            refresh_rollup(date=date, student_ids=student_statuses.keys(), subject_id=lesson.subject_id)
         
         db.session.commit()
         flash("Посещаемость успешно сохранена", "success")
@@ -276,50 +575,43 @@ def bulk(group_admin_group_id=None):
     
     lesson_id = request.args.get("lesson_id")
     
-    # Если выбрана группа, получаем список занятий для этой группы
+    # Если выбрана группа, получаем список занятий и студентов этой группы
+    # (предметы и пользователи подгружаются сразу для отображения в форме)
     lessons = []
-    if group_id:
-        lessons = Lesson.query.filter_by(group_id=group_id).all()
-    
-    # Получаем список студентов для выбранной группы
     students = []
+    scheduled_lesson_ids = []
     if group_id:
-        students = Student.query.filter_by(group_id=group_id).all()
+        lessons = Lesson.query.options(joinedload(Lesson.subject)).filter_by(group_id=group_id).all()
+        students = Student.query.options(joinedload(Student.user)).filter_by(group_id=group_id).all()
+        
+        # Занятия группы по расписанию на выбранную дату идут первыми,
+        # а если занятие не выбрано - выбирается первое из них
+        scheduled_lesson_ids = db.session.scalars(
+            select(LessonOccurrence.lesson_id).where(
+                LessonOccurrence.group_id == group_id,
+                LessonOccurrence.date == datetime.strptime(date, "%Y-%m-%d").date()
+            ).order_by(LessonOccurrence.lesson_number)
+        ).all()
+        if scheduled_lesson_ids:
+            order = {scheduled_id: position for position, scheduled_id in enumerate(scheduled_lesson_ids)}
+            lessons.sort(key=lambda lesson: order.get(lesson.id, len(order)))
+            if not lesson_id:
+                lesson_id = str(scheduled_lesson_ids[0])
     
     # Получаем существующие записи о посещаемости, если выбраны все параметры
     attendance_records = {}
     if date and lesson_id and group_id:
         date_obj = datetime.strptime(date, "%Y-%m-%d").date()  # Берем только дату без времени
         
-        # Получаем список студентов в группе
-        students_in_group = Student.query.filter_by(group_id=group_id).all()
-        student_ids = [student.id for student in students_in_group]
-        
-        # Получаем все записи посещаемости для всех студентов группы на указанную дату и занятие
-        all_records = Attendance.query.filter(
-            Attendance.student_id.in_(student_ids),
+        # Статусы всех студентов группы на указанную дату и занятие одним запросом
+        records = db.session.query(Attendance.student_id, Attendance.status).join(
+            Student, Attendance.student_id == Student.id
+        ).filter(
+            Student.group_id == group_id,
             Attendance.lesson_id == lesson_id,
             Attendance.date == date_obj
-        ).all()
-        
-        # Группируем записи по ID студента для обработки дубликатов
-        records_by_student = {}
-        for record in all_records:
-            if record.student_id not in records_by_student:
-                records_by_student[record.student_id] = []
-            records_by_student[record.student_id].append(record)
-        
-        # Для каждого студента берем последнюю запись (предполагая, что это самая актуальная)
-        for student_id, records in records_by_student.items():
-            if len(records) > 1:
-                print(f"Внимание: найдено {len(records)} записей для студента {student_id} на дату {date_obj} и урок {lesson_id}")
-                # Сортируем по ID (предполагая, что больший ID = более поздняя запись)
-                records.sort(key=lambda r: r.id, reverse=True)
-            
-            # Используем первую запись из отсортированного списка (самую последнюю)
-            latest_record = records[0]
-            attendance_records[student_id] = latest_record.status
-            print(f"Выбрана запись: ID={latest_record.id}, студент={student_id}, статус={latest_record.status}")
+        )
+        attendance_records = {record.student_id: record.status for record in records}
     
     statuses = Attendance.STATUSES
     status_labels = Attendance.STATUS_LABELS
@@ -333,6 +625,7 @@ def bulk(group_admin_group_id=None):
         lessons=lessons,
         students=students,
         attendance_records=attendance_records,
+        scheduled_lesson_ids=scheduled_lesson_ids,
         statuses=statuses,
         status_labels=status_labels
     )
@@ -359,72 +652,601 @@ def report():
     # Фильтруем данные в зависимости от роли пользователя
     if session.get('user_role') == 'admin':
         group_id = request.args.get("group_id")
-        groups = Group.query.all()
+        scope = "admin"
     elif session.get('user_role') == 'student' and session.get('is_group_admin'):
         # Староста группы видит только свою группу
         group_id = session.get('group_id')
-        groups = [Group.query.get(group_id)]
+        scope = "group_admin"
     else:  # обычный студент
         group_id = session.get('group_id')
-        groups = [Group.query.get(group_id)]
+        scope = ("student", session.get('student_id'))
+    group_id = int(group_id) if group_id else None
+    subject_id = int(subject_id) if subject_id else None
+    
+    # Один и тот же отчет запрашивают все студенты группы, поэтому результат кэшируется.
+    # Поколение группы в ключе меняется при любом изменении ее посещаемости
+    cache_key = (group_id, subject_id, start_date, end_date, scope, report_generation(group_id))
+    context = report_cache.get(cache_key)
+    if context is None:
+        context = _report_context(start_date_obj, end_date_obj, group_id, subject_id, scope)
+        report_cache.set(cache_key, context)
+    
+    return render_template(
+        "attendance/report.html", 
+        start_date=start_date,
+        end_date=end_date,
+        selected_group_id=group_id,
+        selected_subject_id=subject_id,
+        **context
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _report_statement(with_group=False, with_subject=False, with_student=False):
+    """
+    Строит запрос отчета по посещаемости на SQLAlchemy Core.
+    
+    Запрос зависит только от набора примененных фильтров, а их значения
+    передаются связанными параметрами (start_date, end_date, group_id,
+    subject_id, student_id). Поэтому каждый вариант запроса собирается
+    один раз на процесс, а SQL компилируется один раз и дальше берется из
+    кэша скомпилированных запросов SQLAlchemy. Агрегаты читаются из сводки
+    attendance_daily; условия по датам и предмету входят в LEFT JOIN, чтобы
+    студенты без отметок оставались в отчете.
+    
+    Args:
+        with_group (bool): Фильтр по группе
+        with_subject (bool): Фильтр по предмету
+        with_student (bool): Фильтр по студенту (для обычного студента)
         
-    # Подготавливаем запрос в зависимости от наличия фильтра по группе и предмету
-    query = """
-        SELECT s.id as student_id, u.first_name, u.last_name, g.name as group_name,
-               COUNT(a.id) as total, 
-               SUM(CASE WHEN a.status = 'present' THEN 1 ELSE 0 END) as presents
-        FROM students s
-        JOIN users u ON s.user_id = u.id
-        JOIN groups g ON s.group_id = g.id
-        LEFT JOIN attendance a ON s.id = a.student_id AND a.date BETWEEN :start_date AND :end_date
+    Returns:
+        sqlalchemy.sql.Select: Запрос отчета
     """
+    students = Student.__table__
+    users = User.__table__
+    groups = Group.__table__
+    daily = AttendanceDaily.__table__
     
-    params = {"start_date": start_date_obj, "end_date": end_date_obj}
+    join_condition = and_(
+        daily.c.student_id == students.c.id,
+        daily.c.date.between(bindparam("start_date"), bindparam("end_date"))
+    )
+    if with_subject:
+        join_condition = and_(join_condition, daily.c.subject_id == bindparam("subject_id"))
     
-    # Добавляем условия для фильтрации по предмету
-    if subject_id:
-        query = """
-            SELECT s.id as student_id, u.first_name, u.last_name, g.name as group_name,
-                   COUNT(a.id) as total, 
-                   SUM(CASE WHEN a.status = 'present' THEN 1 ELSE 0 END) as presents
-            FROM students s
-            JOIN users u ON s.user_id = u.id
-            JOIN groups g ON s.group_id = g.id
-            LEFT JOIN attendance a ON s.id = a.student_id AND a.date BETWEEN :start_date AND :end_date
-            LEFT JOIN lessons l ON a.lesson_id = l.id
-            WHERE l.subject_id = :subject_id
-        """
-        params["subject_id"] = subject_id
+    statement = select(
+        students.c.id.label("student_id"),
+        users.c.first_name,
+        users.c.last_name,
+        groups.c.name.label("group_name"),
+        func.coalesce(func.sum(daily.c.total), 0).label("total"),
+        func.coalesce(func.sum(daily.c.present), 0).label("presents")
+    ).join_from(
+        students, users, students.c.user_id == users.c.id
+    ).join(
+        groups, students.c.group_id == groups.c.id
+    ).outerjoin(
+        daily, join_condition
+    )
+    
+    if with_group:
+        statement = statement.where(students.c.group_id == bindparam("group_id"))
+    if with_student:
+        statement = statement.where(students.c.id == bindparam("student_id"))
+    
+    return statement.group_by(students.c.id, users.c.first_name, users.c.last_name, groups.c.name)
+
+
+def _report_rows(start_date, end_date, group_id=None, subject_id=None, student_id=None):
+    """
+    Выполняет запрос отчета с заданными фильтрами.
     
-    # Добавляем условия для группы
+    Args:
+        start_date (datetime.date): Начальная дата
+        end_date (datetime.date): Конечная дата
+        group_id (int, optional): Идентификатор группы
+        subject_id (int, optional): Идентификатор предмета
+        student_id (int, optional): Идентификатор студента
+        
+    Returns:
+        list: Строки отчета
+    """
+    params = {"start_date": start_date, "end_date": end_date}
     if group_id:
-        if "WHERE" in query:
-            query += " AND s.group_id = :group_id"
-        else:
-            query += " WHERE s.group_id = :group_id"
         params["group_id"] = group_id
+    if subject_id:
+        params["subject_id"] = subject_id
+    if student_id:
+        params["student_id"] = student_id
     
-    # Для обычного студента показываем только его данные
-    if session.get('user_role') == 'student' and not session.get('is_group_admin'):
-        if "WHERE" in query:
-            query += " AND s.id = :student_id"
-        else:
-            query += " WHERE s.id = :student_id"
-        params["student_id"] = session.get('student_id')
+    statement = _report_statement(bool(group_id), bool(subject_id), bool(student_id))
+    return db.session.execute(statement, params).all()
+
+
+def _report_context(start_date, end_date, group_id, subject_id, scope):
+    """
+    Загружает данные отчета по посещаемости.
+    
+    Возвращает только простые строки (не ORM-объекты), чтобы результат
+    можно было хранить в кэше между запросами.
+    
+    Args:
+        start_date (datetime.date): Начальная дата
+        end_date (datetime.date): Конечная дата
+        group_id (int): Идентификатор группы или None
+        subject_id (int): Идентификатор предмета или None
+        scope: Область видимости пользователя ("admin", "group_admin" или ("student", id))
         
-    query += " GROUP BY s.id, u.first_name, u.last_name, g.name"
+    Returns:
+        dict: Строки отчета, списки групп и предметов для фильтров
+    """
+    student_id = None if scope in ("admin", "group_admin") else scope[1]
+    report_data = _report_rows(start_date, end_date, group_id, subject_id, student_id)
     
-    report_data = db.session.execute(text(query), params)
+    groups_query = db.session.query(Group.id, Group.name)
+    if scope != "admin":
+        groups_query = groups_query.filter(Group.id == group_id)
     
-    subjects = Subject.query.all()
+    return dict(
+        report=report_data,
+        groups=groups_query.all(),
+        subjects=db.session.query(Subject.id, Subject.name).all()
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _matrix_statement():
+    """
+    Запрос матрицы посещаемости "студент x предмет" для группы.
+    
+    Студенты группы соединяются со всеми предметами, которые ведутся у группы
+    (по Lesson.subject_id), и с дневной сводкой через LEFT JOIN, поэтому одна
+    группировка по (студент, предмет) возвращает все ячейки, включая пустые.
+    Параметры: group_id, start_date, end_date.
+    
+    Returns:
+        sqlalchemy.sql.Select: Запрос матрицы
+    """
+    students = Student.__table__
+    users = User.__table__
+    subjects = Subject.__table__
+    lessons = Lesson.__table__
+    daily = AttendanceDaily.__table__
+    
+    group_subjects = select(lessons.c.subject_id).where(
+        lessons.c.group_id == bindparam("group_id")
+    ).distinct().subquery()
+    
+    return select(
+        students.c.id.label("student_id"),
+        users.c.first_name,
+        users.c.last_name,
+        subjects.c.id.label("subject_id"),
+        subjects.c.name.label("subject_name"),
+        func.coalesce(func.sum(daily.c.total), 0).label("total"),
+        func.coalesce(func.sum(daily.c.present), 0).label("presents")
+    ).join_from(
+        students, users, students.c.user_id == users.c.id
+    ).join(
+        group_subjects, true()
+    ).join(
+        subjects, subjects.c.id == group_subjects.c.subject_id
+    ).outerjoin(
+        daily, and_(
+            daily.c.student_id == students.c.id,
+            daily.c.subject_id == subjects.c.id,
+            daily.c.date.between(bindparam("start_date"), bindparam("end_date"))
+        )
+    ).where(
+        students.c.group_id == bindparam("group_id")
+    ).group_by(
+        students.c.id, users.c.first_name, users.c.last_name, subjects.c.id, subjects.c.name
+    )
+
+
+def _matrix_context(start_date, end_date, group_id):
+    """
+    Загружает матрицу посещаемости группы одним запросом и разворачивает ее в памяти.
+    
+    Args:
+        start_date (datetime.date): Начальная дата
+        end_date (datetime.date): Конечная дата
+        group_id (int): Идентификатор группы
+        
+    Returns:
+        dict: Предметы (столбцы), строки студентов с ячейками и список групп
+    """
+    subjects = {}
+    rows = {}
+    if group_id:
+        result = db.session.execute(
+            _matrix_statement(),
+            {"group_id": group_id, "start_date": start_date, "end_date": end_date}
+        )
+        for record in result:
+            subjects[record.subject_id] = record.subject_name
+            row = rows.setdefault(record.student_id, {
+                "name": f"{record.first_name or ''} {record.last_name or ''}".strip(),
+                "cells": {}
+            })
+            row["cells"][record.subject_id] = (record.presents, record.total)
+    
+    return dict(
+        subjects=sorted(subjects.items(), key=lambda item: item[1]),
+        rows=sorted(rows.values(), key=lambda row: row["name"])
+    )
+
+
+@bp.route('/matrix')
+@admin_or_group_admin_required
+def matrix(group_admin_group_id=None):
+    """
+    Матрица посещаемости группы: студенты по строкам, предметы по столбцам.
+    
+    Returns:
+        str: Отрендеренный шаблон матрицы
+    """
+    start_date = request.args.get("start_date", (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d"))
+    end_date = request.args.get("end_date", datetime.now().strftime("%Y-%m-%d"))
+    start_date_obj = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
+    
+    # Фильтруем данные в зависимости от роли пользователя
+    if session.get('user_role') == 'admin':
+        group_id = request.args.get("group_id")
+        groups = db.session.query(Group.id, Group.name).all()
+    else:  # староста группы
+        group_id = group_admin_group_id
+        groups = db.session.query(Group.id, Group.name).filter(Group.id == group_id).all()
+    group_id = int(group_id) if group_id else None
+    
+    # Матрица кэшируется вместе с отчетами и сбрасывается теми же изменениями
+    cache_key = ("matrix", group_id, start_date, end_date, report_generation(group_id))
+    context = report_cache.get(cache_key)
+    if context is None:
+        context = _matrix_context(start_date_obj, end_date_obj, group_id)
+        report_cache.set(cache_key, context)
     
     return render_template(
-        "attendance/report.html", 
-        report=report_data,
+        "attendance/matrix.html",
         start_date=start_date,
         end_date=end_date,
         selected_group_id=group_id,
-        selected_subject_id=subject_id,
         groups=groups,
-        subjects=subjects
-    ) 
\ No newline at end of file
+        **context
+    )
+
+
+@bp.route('/unmarked')
+@admin_or_group_admin_required
+def unmarked(group_admin_group_id=None):
+    """
+    Занятия, проведенные по расписанию, по которым не отмечена посещаемость.
+    
+    Даты занятий берутся из таблицы lesson_occurrences, а отсутствие
+    отметок проверяется по индексу посещаемости (занятие, дата).
+    
+    Returns:
+        str: Отрендеренный шаблон со списком пропущенных отметок
+    """
+    today = datetime.now().date()
+    start_date = request.args.get("start_date", (today - timedelta(days=14)).strftime("%Y-%m-%d"))
+    end_date = request.args.get("end_date", today.strftime("%Y-%m-%d"))
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    # Будущие занятия еще не проведены
+    end = min(datetime.strptime(end_date, "%Y-%m-%d").date(), today)
+    
+    if session.get('user_role') == 'admin':
+        group_id = request.args.get("group_id", type=int)
+        groups = db.session.query(Group.id, Group.name).order_by(Group.name).all()
+    else:
+        group_id = group_admin_group_id
+        groups = db.session.query(Group.id, Group.name).filter(Group.id == group_id).all()
+    
+    marked = select(Attendance.id).where(
+        Attendance.lesson_id == LessonOccurrence.lesson_id,
+        Attendance.date == LessonOccurrence.date
+    ).exists()
+    
+    query = db.session.query(
+        LessonOccurrence.date,
+        LessonOccurrence.lesson_id,
+        LessonOccurrence.lesson_number,
+        LessonOccurrence.group_id,
+        Group.name.label("group_name"),
+        Subject.name.label("subject_name"),
+        Lesson.lesson_type
+    ).join(
+        Lesson, LessonOccurrence.lesson_id == Lesson.id
+    ).join(
+        Subject, Lesson.subject_id == Subject.id
+    ).join(
+        Group, LessonOccurrence.group_id == Group.id
+    ).filter(
+        LessonOccurrence.date.between(start, end),
+        ~marked
+    )
+    if group_id:
+        query = query.filter(LessonOccurrence.group_id == group_id)
+    
+    return render_template(
+        "attendance/unmarked.html",
+        occurrences=query.order_by(
+            LessonOccurrence.date.desc(), Group.name, LessonOccurrence.lesson_number
+        ).all(),
+        groups=groups,
+        selected_group_id=group_id,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+
+def _week_start(column, dialect):
+    """
+    Выражение для начала недели (понедельника), в которую попадает дата.
+    
+    Args:
+        column: Столбец с датой
+        dialect (str): Имя диалекта базы данных
+        
+    Returns:
+        Выражение SQLAlchemy
+    """
+    if dialect == "postgresql":
+        return cast(func.date_trunc(literal_column("'week'"), column), Date)
+    if dialect in ("mysql", "mariadb"):
+        return func.subdate(column, func.weekday(column))
+    # SQLite: ближайшее воскресенье не раньше даты минус шесть дней
+    return func.date(column, literal_column("'weekday 0'"), literal_column("'-6 days'"))
+
+
+@functools.lru_cache(maxsize=None)
+def _trend_statement(dialect, with_subject=False):
+    """
+    Запрос недельной динамики посещаемости группы.
+    
+    Даты сводки attendance_daily группируются по неделям средствами СУБД,
+    а скользящее среднее за 4 календарные недели (текущую и три
+    предыдущие) считается оконной функцией.
+    Параметры: group_id, start_date, end_date и, при фильтре по предмету, subject_id.
+    
+    Args:
+        dialect (str): Имя диалекта базы данных
+        with_subject (bool): Фильтр по предмету
+        
+    Returns:
+        sqlalchemy.sql.Select: Запрос динамики
+    """
+    students = Student.__table__
+    daily = AttendanceDaily.__table__
+    week = _week_start(daily.c.date, dialect)
+    
+    weekly = select(
+        week.label("week"),
+        func.sum(daily.c.present).label("presents"),
+        func.sum(daily.c.total).label("total"),
+        (func.sum(daily.c.present) * literal_column("100.0") / func.sum(daily.c.total)).label("rate")
+    ).join_from(
+        daily, students, daily.c.student_id == students.c.id
+    ).where(
+        students.c.group_id == bindparam("group_id"),
+        daily.c.date.between(bindparam("start_date"), bindparam("end_date"))
+    )
+    if with_subject:
+        weekly = weekly.where(daily.c.subject_id == bindparam("subject_id"))
+    weekly = weekly.group_by(week).subquery("weekly")
+    
+    # Окно задается по датам недель, а не по строкам: у недель без отметок
+    # (каникулы) строк нет. Границы задаются литералом: MySQL не принимает их
+    # параметрами, а SQLite и MariaDB допускают смещение RANGE только для числа
+    if dialect == "postgresql":
+        window = "ORDER BY weekly.week RANGE BETWEEN INTERVAL '21 days' PRECEDING AND CURRENT ROW"
+    elif dialect in ("mysql", "mariadb"):
+        window = "ORDER BY TO_DAYS(weekly.week) RANGE BETWEEN 21 PRECEDING AND CURRENT ROW"
+    else:
+        window = "ORDER BY julianday(weekly.week) RANGE BETWEEN 21 PRECEDING AND CURRENT ROW"
+    rolling_rate = literal_column(f"AVG(weekly.rate) OVER ({window})", Float)
+    return select(
+        weekly.c.week,
+        weekly.c.presents,
+        weekly.c.total,
+        weekly.c.rate,
+        rolling_rate.label("rolling_rate")
+    ).order_by(weekly.c.week)
+
+
+def _trend_points(group_id, semester, subject_id=None):
+    """
+    Загружает недельную динамику посещаемости группы за семестр.
+    
+    Результат кэшируется по (группа, предмет, семестр) и сбрасывается
+    при изменении посещаемости группы.
+    
+    Args:
+        group_id (int): Идентификатор группы
+        semester (Semester): Семестр
+        subject_id (int, optional): Идентификатор предмета
+        
+    Returns:
+        list: Точки динамики (неделя, присутствия, всего, процент, скользящее среднее)
+    """
+    start_date, end_date = semester.start_date, semester.end_date
+    # Даты входят в ключ: изменение границ семестра не отдает старый результат
+    cache_key = ("trend", group_id, subject_id, semester.id, start_date, end_date, report_generation(group_id))
+    points = report_cache.get(cache_key)
+    if points is None:
+        params = {"group_id": group_id, "start_date": start_date, "end_date": end_date}
+        if subject_id:
+            params["subject_id"] = subject_id
+        dialect = db.session.get_bind().dialect.name
+        points = [
+            dict(
+                week=str(row.week)[:10],
+                presents=int(row.presents),
+                total=int(row.total),
+                rate=round(float(row.rate), 1),
+                rolling_rate=round(float(row.rolling_rate), 1)
+            )
+            for row in db.session.execute(_trend_statement(dialect, bool(subject_id)), params)
+        ]
+        report_cache.set(cache_key, points)
+    return points
+
+
+def _trend_filters():
+    """
+    Читает параметры динамики из запроса с учетом роли пользователя.
+    
+    Семестр выбирается из таблицы semesters, по умолчанию - текущий,
+    а вне семестров - последний начавшийся.
+    
+    Returns:
+        tuple: (group_id, subject_id, семестр или None, если семестры не заданы)
+    """
+    if session.get('user_role') == 'admin':
+        group_id = request.args.get("group_id")
+    else:
+        group_id = session.get('group_id')
+    subject_id = request.args.get("subject_id")
+    semester_id = request.args.get("semester_id", type=int)
+    semester = db.session.get(Semester, semester_id) if semester_id else None
+    if semester is None:
+        semester = Semester.current() or Semester.query.filter(
+            Semester.start_date <= datetime.now().date()
+        ).order_by(Semester.start_date.desc()).first()
+    return int(group_id) if group_id else None, int(subject_id) if subject_id else None, semester
+
+
+@bp.route('/trend')
+@login_required
+def trend():
+    """
+    График недельной динамики посещаемости группы за семестр.
+    
+    Returns:
+        str: Отрендеренный шаблон с графиком
+    """
+    group_id, subject_id, semester = _trend_filters()
+    points = _trend_points(group_id, semester, subject_id) if group_id and semester else []
+    
+    groups_query = db.session.query(Group.id, Group.name)
+    if session.get('user_role') != 'admin':
+        groups_query = groups_query.filter(Group.id == group_id)
+    
+    return render_template(
+        "attendance/trend.html",
+        points=points,
+        selected_group_id=group_id,
+        selected_subject_id=subject_id,
+        selected_semester=semester,
+        semesters=Semester.query.order_by(Semester.start_date.desc()).all(),
+        groups=groups_query.all(),
+        subjects=db.session.query(Subject.id, Subject.name).all()
+    )
+
+
+@bp.route('/trend/data')
+@login_required
+def trend_data():
+    """
+    Недельная динамика посещаемости группы за семестр в формате JSON.
+    
+    Returns:
+        Response: JSON с точками динамики
+    """
+    group_id, subject_id, semester = _trend_filters()
+    if not group_id:
+        return jsonify(error="Не указана группа"), 400
+    if semester is None:
+        return jsonify(error="Семестры не заданы"), 404
+    return jsonify(
+        group_id=group_id,
+        subject_id=subject_id,
+        semester_id=semester.id,
+        semester=semester.name,
+        points=_trend_points(group_id, semester, subject_id)
+    )
+
+
+@bp.route('/at-risk')
+@admin_required
+def at_risk():
+    """
+    Список студентов группы риска за текущий семестр.
+    
+    Читает заранее посчитанную таблицу at_risk_students, которую обновляет
+    команда flask attendance refresh-at-risk.
+    
+    Returns:
+        str: Отрендеренный шаблон со списком
+    """
+    group_id = request.args.get('group_id', type=int)
+    semester = Semester.current()
+    
+    query = db.session.query(
+        AtRiskStudent.student_id,
+        AtRiskStudent.total,
+        AtRiskStudent.presents,
+        AtRiskStudent.presence_rate,
+        AtRiskStudent.absence_streak,
+        AtRiskStudent.updated_at,
+        User.first_name,
+        User.last_name,
+        Group.name.label("group_name")
+    ).join(
+        Student, AtRiskStudent.student_id == Student.id
+    ).join(
+        User, Student.user_id == User.id
+    ).join(
+        Group, Student.group_id == Group.id
+    ).filter(
+        AtRiskStudent.semester_id == (semester.id if semester else None)
+    )
+    if group_id:
+        query = query.filter(Student.group_id == group_id)
+    
+    return render_template(
+        "attendance/at_risk.html",
+        students=query.order_by(AtRiskStudent.presence_rate, User.last_name).all() if semester else [],
+        groups=db.session.query(Group.id, Group.name).order_by(Group.name).all(),
+        selected_group_id=group_id,
+        semester=semester,
+        min_rate=current_app.config['AT_RISK_MIN_RATE'],
+        absence_streak=current_app.config['AT_RISK_ABSENCE_STREAK']
+    )
+
+
+@bp.cli.command('rebuild-rollup')
+def rebuild_rollup_command():
+    """
+    Пересобирает дневную сводку посещаемости по всем записям.
+    
+    Запуск: flask attendance rebuild-rollup
+    """
+    rows = rebuild_rollup()
+    print(f"Сводка посещаемости пересобрана: {rows} строк")
+
+
+@bp.cli.command('refresh-at-risk')
+@click.option('--full', is_flag=True, help='Пересчитать всех студентов, а не только измененных')
+@click.option('--interval', type=int, default=0, help='Повторять пересчет каждые N секунд')
+def refresh_at_risk_command(full, interval):
+    """
+    Пересчитывает список студентов группы риска.
+    
+    Запуск: flask attendance refresh-at-risk [--full] [--interval 300]
+    """
+    while True:
+        try:
+            processed = refresh_at_risk(full=full)
+            print(f"Группа риска пересчитана: {processed} студентов")
+            full = False
+        except Exception:
+            if not interval:
+                raise
+            # В режиме повторения ошибка одного запуска не останавливает цикл
+            db.session.rollback()
+            current_app.logger.exception("Ошибка пересчета группы риска")
+        if not interval:
+            break
+        time.sleep(interval)
@@ -5,6 +5,8 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from app import db
 from app.models.user import User
 from app.models.student import Student
+from app.utils.passwords import PasswordHashingBusy
+from app.utils import rate_limit
 
 # Создаем Blueprint
 bp = Blueprint('auth', __name__)
@@ -21,9 +23,30 @@ def login():
         username = request.form["username"]
         password = request.form["password"]
         
+        # Лимит неудачных входов проверяется до поиска пользователя и
+        # проверки пароля, а расходуется только при неверном пароле
+        retry_after = rate_limit.login_retry_after(username)
+        if retry_after:
+            return rate_limit.too_many_requests(retry_after)
+        
         user = User.query.filter_by(username=username).first()
         
-        if user and user.check_password(password):
+        try:
+            authenticated = user is not None and user.check_password(password)
+        except PasswordHashingBusy:
+            flash("Слишком много одновременных входов, попробуйте через несколько секунд", "warning")
+            return render_template("auth/login.html"), 503
+        
+        # Пересчитываем хеш, посчитанный по устаревшей политике. Если слоты
+        # заняты, вход не откладывается: хеш пересчитается при следующем входе
+        if authenticated and user.password_needs_rehash:
+            try:
+                user.set_password(password)
+                db.session.commit()
+            except PasswordHashingBusy:
+                pass
+        
+        if authenticated:
             # Успешная аутентификация
             session["user_id"] = user.id
             session["username"] = user.username
@@ -46,6 +69,7 @@ def login():
                 return redirect(next_page)
             return redirect(url_for('main.index'))
         else:
+            rate_limit.login_failed(username)
             flash("Неверное имя пользователя или пароль", "danger")
     
     return render_template("auth/login.html")
@@ -1,25 +1,97 @@
 """
 Маршруты для управления группами.
 """
+import click
 from flask import Blueprint, render_template, request, redirect, url_for, flash
+from sqlalchemy import select, func, false
 from app import db
+from app.models.attendance_daily import AttendanceDaily
 from app.models.group import Group
+from app.models.lesson import Lesson
+from app.models.semester import Semester
+from app.models.student import Student
 from app.utils.decorators import admin_required
+from app.utils.cache import invalidate_report_cache
+from app.utils.deletion import delete_group
+from app.utils.helpers import calculate_attendance_percentage
+from app.utils.schedule import schedule_changed
 
 # Создаем Blueprint
 bp = Blueprint('groups', __name__)
 
+
+def _groups_with_stats(semester):
+    """
+    Загружает группы с количеством студентов, занятий в расписании и
+    посещаемостью за семестр одним запросом.
+    
+    Каждый показатель считается в отдельном подзапросе с группировкой по
+    группе, чтобы соединение студентов с занятиями не умножало строки.
+    Посещаемость берется из дневной сводки.
+    
+    Args:
+        semester (Semester): Семестр; None - посещаемость не считается
+    
+    Returns:
+        list: Строки с полями group, students, lessons, total, presents, rate
+    """
+    students = select(
+        Student.group_id,
+        func.count(Student.id).label("students")
+    ).group_by(Student.group_id).subquery()
+    lessons = select(
+        Lesson.group_id,
+        func.count(Lesson.id).label("lessons")
+    ).group_by(Lesson.group_id).subquery()
+    marks = select(
+        Student.group_id,
+        func.sum(AttendanceDaily.total).label("total"),
+        func.sum(AttendanceDaily.present).label("presents")
+    ).join(
+        AttendanceDaily, AttendanceDaily.student_id == Student.id
+    ).where(
+        AttendanceDaily.date.between(semester.start_date, semester.end_date) if semester else false()
+    ).group_by(Student.group_id).subquery()
+    
+    rows = db.session.execute(
+        select(
+            Group,
+            func.coalesce(students.c.students, 0).label("students"),
+            func.coalesce(lessons.c.lessons, 0).label("lessons"),
+            func.coalesce(marks.c.total, 0).label("total"),
+            func.coalesce(marks.c.presents, 0).label("presents")
+        ).outerjoin(
+            students, students.c.group_id == Group.id
+        ).outerjoin(
+            lessons, lessons.c.group_id == Group.id
+        ).outerjoin(
+            marks, marks.c.group_id == Group.id
+        ).order_by(Group.name)
+    ).all()
+    return [
+        dict(
+            group=row.Group,
+            students=row.students,
+            lessons=row.lessons,
+            total=row.total,
+            presents=row.presents,
+            rate=round(calculate_attendance_percentage(row.presents, row.total), 1)
+        )
+        for row in rows
+    ]
+
+
 @bp.route('/')
 @admin_required
 def list():
     """
-    Список групп.
+    Список групп с количеством студентов, занятий и посещаемостью.
     
     Returns:
         str: Отрендеренный шаблон списка групп
     """
-    groups = Group.query.all()
-    return render_template("groups/list.html", groups=groups)
+    semester = Semester.current()
+    return render_template("groups/list.html", groups=_groups_with_stats(semester), semester=semester)
 
 
 @bp.route('/create', methods=["GET", "POST"])
@@ -38,6 +110,7 @@ def create():
             specialty=request.form.get("specialty")
         )
         db.session.add(group)
+        invalidate_report_cache()
         db.session.commit()
         flash("Группа создана", "success")
         return redirect(url_for('groups.list'))
@@ -61,6 +134,8 @@ def edit(id):
         group.name = request.form["name"]
         group.study_year = int(request.form["study_year"])
         group.specialty = request.form.get("specialty")
+        invalidate_report_cache()
+        schedule_changed(group.id)
         db.session.commit()
         flash("Данные группы обновлены", "success")
         return redirect(url_for('groups.list'))
@@ -80,39 +155,20 @@ def delete(id):
         Response: Перенаправление на список групп
     """
     group = Group.query.get_or_404(id)
+    counts = delete_group(group.id)
+    flash(f"Группа удалена (студентов: {counts['students']}, занятий: {counts['lessons']}, отметок: {counts['attendance']})", "warning")
+    return redirect(url_for('groups.list'))
+
+
+@bp.cli.command('delete')
+@click.argument('group_id', type=int)
+def delete_command(group_id):
+    """
+    Удаляет группу со студентами и занятиями, выводя ход удаления.
     
-    # Сначала удаляем все записи посещаемости для студентов этой группы и занятий этой группы
-    from app.models.student import Student
-    from app.models.lesson import Lesson
-    from app.models.attendance import Attendance
-    
-    # Получаем всех студентов группы
-    students = Student.query.filter_by(group_id=group.id).all()
-    student_ids = [student.id for student in students]
-    
-    # Получаем все занятия группы
-    lessons = Lesson.query.filter_by(group_id=group.id).all()
-    lesson_ids = [lesson.id for lesson in lessons]
-    
-    # Удаляем записи посещаемости для этих студентов и занятий
-    if student_ids:
-        Attendance.query.filter(Attendance.student_id.in_(student_ids)).delete(synchronize_session=False)
-    
-    if lesson_ids:
-        Attendance.query.filter(Attendance.lesson_id.in_(lesson_ids)).delete(synchronize_session=False)
-    
-    # Удаляем студентов группы
-    if students:
-        for student in students:
-            db.session.delete(student)
-    
-    # Удаляем занятия группы
-    if lessons:
-        for lesson in lessons:
-            db.session.delete(lesson)
-    
-    # Затем удаляем саму группу
-    db.session.delete(group)
-    db.session.commit()
-    flash("Группа удалена", "warning")
-    return redirect(url_for('groups.list')) 
\ No newline at end of file
+    Запуск: flask groups delete ID
+    """
+    if db.session.get(Group, group_id) is None:
+        raise click.ClickException(f"Группа {group_id} не найдена")
+    counts = delete_group(group_id, progress=lambda table, done: print(f"{table}: удалено {done}"))
+    print(f"Группа {group_id} удалена: {dict(counts)}")
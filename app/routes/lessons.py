@@ -1,43 +1,61 @@
 """
 Маршруты для управления занятиями.
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from datetime import datetime, timezone
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app, abort, Response
+from itsdangerous import URLSafeSerializer, BadSignature
+from sqlalchemy import select
 from app import db
 from app.models.lesson import Lesson
 from app.models.group import Group
 from app.models.subject import Subject
 from app.models.student import Student
-from app.utils.decorators import login_required, admin_required
 from app.models.attendance import Attendance
+from app.models.lesson_occurrence import LessonOccurrence
+from app.utils.decorators import login_required, admin_required
+from app.utils.rollup import refresh_rollup
+from app.utils.occurrences import regenerate_occurrences
+from app.utils.deletion import delete_lessons
+from app.utils.cache import timetable_cache, timetable_generation, feed_cache, invalidate_report_cache
+from app.utils.schedule import schedule_changed, schedule_version
+from app.utils.ical import render_calendar
+from app.utils import metrics
 
 # Создаем Blueprint
 bp = Blueprint('lessons', __name__)
 
-@bp.route('/')
-@login_required
-def list():
+def _timetable(group_id, week_type):
     """
-    Список занятий с фильтрацией по типу недели и группе.
+    Возвращает расписание группы, разложенное по дням недели.
+    
+    Расписание загружается одним запросом вместе с названиями предметов
+    и групп и кэшируется по (группа, тип недели) до изменения занятий.
+    
+    Args:
+        group_id (int, optional): Идентификатор группы; None - все группы
+        week_type (str): Тип недели или "Все"
     
     Returns:
-        str: Отрендеренный шаблон списка занятий
+        dict: День недели -> список занятий (словари) в порядке номеров пар
     """
-    week_type = request.args.get("week_type", "Обе")
-    
-    # Фильтрация по группе в зависимости от роли пользователя
-    if session.get('user_role') == 'admin':
-        group_id = request.args.get("group_id")
-        groups = Group.query.all()
-    elif session.get('user_role') == 'student':
-        # Для студента показываем только его группу
-        group_id = session.get('group_id')
-        groups = [Group.query.get(group_id)]
-    else:
-        group_id = None
-        groups = []
+    cache_key = (group_id, week_type, timetable_generation(group_id))
+    lessons_by_day = timetable_cache.get(cache_key)
+    if lessons_by_day is not None:
+        return lessons_by_day
     
-    # Базовый запрос
-    query = Lesson.query
+    query = db.session.query(
+        Lesson.id,
+        Lesson.day_of_week,
+        Lesson.lesson_number,
+        Lesson.lesson_type,
+        Lesson.week_type,
+        Subject.name.label("subject_name"),
+        Group.name.label("group_name")
+    ).join(
+        Subject, Lesson.subject_id == Subject.id
+    ).join(
+        Group, Lesson.group_id == Group.id
+    )
     
     # Фильтрация по типу недели
     if week_type != "Все":
@@ -48,36 +66,194 @@ def list():
     
     # Фильтрация по группе, если выбрана
     if group_id:
-        query = query.filter_by(group_id=group_id)
+        query = query.filter(Lesson.group_id == group_id)
     
-    # Получение и группировка занятий по дням недели
-    lessons = query.order_by(Lesson.day_of_week, Lesson.lesson_number).all()
+    # Дни недели идут в порядке Lesson.DAYS_OF_WEEK, а не по алфавиту
+    lessons_by_day = {day_code: [] for day_code in Lesson.DAYS_OF_WEEK}
+    for lesson in query.order_by(Lesson.lesson_number, Group.name):
+        if lesson.day_of_week in lessons_by_day:
+            lessons_by_day[lesson.day_of_week].append(lesson._asdict())
     
-    # Группировка занятий по дням недели
-    days_order = {"Пн": 1, "Вт": 2, "Ср": 3, "Чт": 4, "Пт": 5, "Сб": 6}
-    lessons_by_day = {}
+    timetable_cache.set(cache_key, lessons_by_day)
+    return lessons_by_day
+
+
+def _feed_serializer():
+    """
+    Возвращает подписчик ссылок на календарные ленты.
+    
+    Returns:
+        URLSafeSerializer: Подписчик на основе SECRET_KEY
+    """
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt="calendar-feed")
+
+
+def _feed_url(kind, object_id):
+    """
+    Формирует постоянную ссылку на календарную ленту.
     
-    for day_code in days_order.keys():
-        lessons_by_day[day_code] = []
+    Календарные приложения не передают cookie сессии, поэтому доступ к
+    ленте дает подписанный токен в адресе.
     
-    for lesson in lessons:
-        if lesson.day_of_week in lessons_by_day:
-            lessons_by_day[lesson.day_of_week].append(lesson)
+    Args:
+        kind (str): "group" или "student"
+        object_id (int): Идентификатор группы или студента
+    
+    Returns:
+        str: Абсолютный адрес ленты
+    """
+    token = _feed_serializer().dumps([kind, object_id])
+    return url_for('lessons.calendar_feed', token=token, _external=True)
+
+
+def _feed_events(group_id):
+    """
+    Загружает даты занятий группы для календаря.
+    
+    Args:
+        group_id (int): Идентификатор группы
+    
+    Returns:
+        list: Строки с полями lesson_id, date, lesson_number, subject_name,
+        lesson_type, group_name в хронологическом порядке
+    """
+    return db.session.query(
+        LessonOccurrence.lesson_id,
+        LessonOccurrence.date,
+        LessonOccurrence.lesson_number,
+        Subject.name.label("subject_name"),
+        Lesson.lesson_type,
+        Group.name.label("group_name")
+    ).join(
+        Lesson, LessonOccurrence.lesson_id == Lesson.id
+    ).join(
+        Subject, Lesson.subject_id == Subject.id
+    ).join(
+        Group, LessonOccurrence.group_id == Group.id
+    ).filter(
+        LessonOccurrence.group_id == group_id
+    ).order_by(
+        LessonOccurrence.date, LessonOccurrence.lesson_number
+    ).all()
+
+
+@bp.route('/')
+@login_required
+def list():
+    """
+    Список занятий с фильтрацией по типу недели и группе.
+    
+    Returns:
+        str: Отрендеренный шаблон списка занятий
+    """
+    week_type = request.args.get("week_type", "Обе")
+    
+    # Фильтрация по группе в зависимости от роли пользователя
+    if session.get('user_role') == 'admin':
+        group_id = request.args.get("group_id", type=int)
+        groups = db.session.query(Group.id, Group.name).all()
+    elif session.get('user_role') == 'student':
+        # Для студента показываем только его группу
+        group_id = session.get('group_id')
+        groups = db.session.query(Group.id, Group.name).filter(Group.id == group_id).all()
+    else:
+        group_id = None
+        groups = []
     
     # Определяем, имеет ли пользователь право на редактирование
     can_edit = session.get('user_role') == 'admin'
     
+    # Ссылка на календарь: студенту - личная, администратору - выбранной группы
+    if session.get('user_role') == 'student' and session.get('student_id'):
+        feed_url = _feed_url("student", session['student_id'])
+    elif can_edit and group_id:
+        feed_url = _feed_url("group", group_id)
+    else:
+        feed_url = None
+    
     return render_template(
         "lessons/list.html", 
-        lessons_by_day=lessons_by_day, 
-        days_order=days_order,
+        lessons_by_day=_timetable(group_id, week_type), 
         week_type=week_type,
         selected_group_id=group_id,
         groups=groups,
-        can_edit=can_edit
+        can_edit=can_edit,
+        feed_url=feed_url
     )
 
 
+@bp.route('/calendar/<token>.ics')
+def calendar_feed(token):
+    """
+    Календарь занятий группы или студента в формате iCalendar.
+    
+    Ответ снабжается сильным ETag и Last-Modified по версии расписания
+    группы. Если клиент прислал актуальные значения, возвращается 304 без
+    загрузки занятий; иначе календарь берется из кэша по (группа, версия)
+    и формируется заново только после изменения расписания.
+    
+    Args:
+        token (str): Подписанный токен ленты
+    
+    Returns:
+        Response: Календарь (text/calendar) или 304 Not Modified
+    """
+    try:
+        kind, object_id = _feed_serializer().loads(token)
+    except (BadSignature, ValueError, TypeError):
+        abort(404)
+    
+    if kind == "group":
+        group_id = object_id
+    elif kind == "student":
+        # Лента студента следует за ним при переводе в другую группу
+        group_id = db.session.query(Student.group_id).filter(Student.id == object_id).scalar()
+    else:
+        group_id = None
+    if group_id is None:
+        abort(404)
+    
+    version, updated_at = schedule_version(group_id)
+    etag = f"{group_id}.{version}"
+    last_modified = updated_at.replace(microsecond=0, tzinfo=timezone.utc) if updated_at else None
+    
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = (
+            last_modified is not None
+            and request.if_modified_since is not None
+            and last_modified <= request.if_modified_since
+        )
+    
+    if not_modified:
+        metrics.increment("calendar_feed.not_modified")
+        response = Response(status=304)
+    else:
+        cache_key = (group_id, version)
+        body = feed_cache.get(cache_key)
+        if body is None:
+            group_name = db.session.query(Group.name).filter(Group.id == group_id).scalar()
+            if group_name is None:
+                abort(404)
+            body = render_calendar(
+                f"Расписание {group_name}",
+                _feed_events(group_id),
+                current_app.config['CALENDAR_TIMEZONE'],
+                current_app.config['LESSON_TIMES'],
+                updated_at or datetime.utcnow()
+            )
+            feed_cache.set(cache_key, body)
+        response = Response(body, mimetype="text/calendar")
+    
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Клиент хранит копию, но перед использованием проверяет ее условным запросом
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
 @bp.route('/create', methods=["GET", "POST"])
 @admin_required
 def create():
@@ -97,6 +273,10 @@ def create():
             lesson_number=int(request.form["lesson_number"])
         )
         db.session.add(lesson)
+        db.session.flush()
+        regenerate_occurrences(lesson_ids=[lesson.id])
+        invalidate_report_cache(lesson.group_id)
+        schedule_changed(lesson.group_id)
         db.session.commit()
         flash("Занятие создано", "success")
         return redirect(url_for('lessons.list'))
@@ -127,18 +307,36 @@ def edit(id):
     
     Args:
         id (int): Идентификатор занятия
-        
+    
     Returns:
         str или Response: Отрендеренный шаблон формы или перенаправление на список
     """
     lesson = Lesson.query.get_or_404(id)
     if request.method == "POST":
+        old_subject_id, old_group_id = lesson.subject_id, lesson.group_id
         lesson.subject_id = int(request.form["subject_id"])
         lesson.group_id = int(request.form["group_id"])
         lesson.lesson_type = request.form["lesson_type"]
         lesson.week_type = request.form["week_type"]
         lesson.day_of_week = request.form["day_of_week"]
         lesson.lesson_number = int(request.form["lesson_number"])
+        
+        # Отметки занятия относятся к предмету, поэтому при его смене пересчитываем
+        # сводку. Отмеченные студенты могли с тех пор перейти в другую группу,
+        # поэтому они выбираются по отметкам занятия, а не по группе
+        if lesson.subject_id != old_subject_id:
+            student_ids = db.session.scalars(
+                select(Attendance.student_id).where(Attendance.lesson_id == lesson.id).distinct()
+            ).all()
+            if student_ids:
+                refresh_rollup(student_ids=student_ids, subject_id=old_subject_id)
+                refresh_rollup(student_ids=student_ids, subject_id=lesson.subject_id)
+        regenerate_occurrences(lesson_ids=[lesson.id])
+        # Матрица и отчеты обеих групп строятся по занятиям
+        invalidate_report_cache(old_group_id)
+        invalidate_report_cache(lesson.group_id)
+        schedule_changed(old_group_id)
+        schedule_changed(lesson.group_id)
         db.session.commit()
         flash("Данные занятия обновлены", "success")
         return redirect(url_for('lessons.list'))
@@ -170,17 +368,11 @@ def delete(id):
     
     Args:
         id (int): Идентификатор занятия
-        
+    
     Returns:
         Response: Перенаправление на список занятий
     """
     lesson = Lesson.query.get_or_404(id)
-    
-    # Сначала удаляем все записи посещаемости для этого занятия
-    Attendance.query.filter_by(lesson_id=lesson.id).delete()
-    
-    # Затем удаляем само занятие
-    db.session.delete(lesson)
-    db.session.commit()
+    delete_lessons([lesson.id])
     flash("Занятие удалено", "warning")
     return redirect(url_for('lessons.list')) 
\ No newline at end of file
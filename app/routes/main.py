@@ -1,7 +1,9 @@
 """
 Основные маршруты приложения.
 """
-from flask import Blueprint, redirect, url_for
+from flask import Blueprint, redirect, url_for, jsonify
+from app.utils import metrics
+from app.utils.decorators import admin_required
 
 # Создаем Blueprint
 bp = Blueprint('main', __name__)
@@ -14,4 +16,16 @@ def index():
     Returns:
         Redirect: Перенаправление на страницу списка посещаемости
     """
-    return redirect(url_for('attendance.list')) 
\ No newline at end of file
+    return redirect(url_for('attendance.list')) 
+
+
+@bp.route('/metrics')
+@admin_required
+def metrics_view():
+    """
+    Счетчики метрик текущего процесса (попадания в кэш и т.п.).
+    
+    Returns:
+        Response: JSON со значениями счетчиков
+    """
+    return jsonify(metrics.snapshot())
@@ -0,0 +1,164 @@
+"""
+Маршруты для управления семестрами.
+"""
+from datetime import datetime
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from sqlalchemy import select
+from app import db
+from app.models.at_risk_student import AtRiskStudent
+from app.models.semester import Semester
+from app.models.lesson_occurrence import LessonOccurrence
+from app.models.student import Student
+from app.utils.at_risk import enqueue_at_risk
+from app.utils.decorators import admin_required
+from app.utils.occurrences import regenerate_occurrences
+from app.utils.schedule import schedule_changed
+
+# Создаем Blueprint
+bp = Blueprint('semesters', __name__)
+
+
+def _read_form():
+    """
+    Читает и проверяет поля семестра из формы.
+    
+    Returns:
+        tuple: (название, начало, конец, тип первой недели) или None при ошибке
+    """
+    start_date = datetime.strptime(request.form["start_date"], "%Y-%m-%d").date()
+    end_date = datetime.strptime(request.form["end_date"], "%Y-%m-%d").date()
+    if end_date < start_date:
+        flash("Дата окончания семестра раньше даты начала", "danger")
+        return None
+    first_week_type = request.form.get("first_week_type", "Нечет")
+    if first_week_type not in ("Чет", "Нечет"):
+        first_week_type = "Нечет"
+    return request.form["name"], start_date, end_date, first_week_type
+
+
+def _overlaps(start_date, end_date, exclude_id=None):
+    """
+    Проверяет, пересекается ли период с другими семестрами.
+    
+    Args:
+        start_date (datetime.date): Начало периода
+        end_date (datetime.date): Конец периода
+        exclude_id (int, optional): Семестр, который не учитывается
+        
+    Returns:
+        bool: True если есть пересечение
+    """
+    query = Semester.overlapping(start_date, end_date, exclude_id)
+    return db.session.query(query.exists()).scalar()
+
+
+@bp.route('/')
+@admin_required
+def list():
+    """
+    Список семестров.
+    
+    Returns:
+        str: Отрендеренный шаблон списка семестров
+    """
+    semesters = Semester.query.order_by(Semester.start_date.desc()).all()
+    return render_template("semesters/list.html", semesters=semesters)
+
+
+@bp.route('/create', methods=["GET", "POST"])
+@admin_required
+def create():
+    """
+    Создание нового семестра.
+    
+    Даты занятий по расписанию генерируются для нового семестра сразу.
+    
+    Returns:
+        str или Response: Отрендеренный шаблон формы или перенаправление на список
+    """
+    if request.method == "POST":
+        fields = _read_form()
+        if fields is None:
+            return redirect(url_for('semesters.create'))
+        if _overlaps(fields[1], fields[2]):
+            flash("Семестр пересекается с уже существующим", "danger")
+            return redirect(url_for('semesters.create'))
+        
+        semester = Semester(*fields)
+        db.session.add(semester)
+        db.session.flush()
+        regenerate_occurrences(semester_id=semester.id)
+        schedule_changed()
+        # Границы текущего семестра определяют группу риска
+        enqueue_at_risk(select(Student.id))
+        db.session.commit()
+        flash("Семестр создан", "success")
+        return redirect(url_for('semesters.list'))
+    return render_template("semesters/create.html")
+
+
+@bp.route('/edit/<int:id>', methods=["GET", "POST"])
+@admin_required
+def edit(id):
+    """
+    Редактирование существующего семестра.
+    
+    Args:
+        id (int): Идентификатор семестра
+        
+    Returns:
+        str или Response: Отрендеренный шаблон формы или перенаправление на список
+    """
+    semester = Semester.query.get_or_404(id)
+    if request.method == "POST":
+        fields = _read_form()
+        if fields is None:
+            return redirect(url_for('semesters.edit', id=id))
+        if _overlaps(fields[1], fields[2], exclude_id=id):
+            flash("Семестр пересекается с уже существующим", "danger")
+            return redirect(url_for('semesters.edit', id=id))
+        
+        semester.name, semester.start_date, semester.end_date, semester.first_week_type = fields
+        regenerate_occurrences(semester_id=semester.id)
+        schedule_changed()
+        enqueue_at_risk(select(Student.id))
+        db.session.commit()
+        flash("Данные семестра обновлены", "success")
+        return redirect(url_for('semesters.list'))
+    return render_template("semesters/edit.html", semester=semester)
+
+
+@bp.route('/delete/<int:id>', methods=["POST"])
+@admin_required
+def delete(id):
+    """
+    Удаление семестра вместе с датами занятий.
+    
+    Args:
+        id (int): Идентификатор семестра
+        
+    Returns:
+        Response: Перенаправление на список семестров
+    """
+    semester = Semester.query.get_or_404(id)
+    LessonOccurrence.query.filter_by(semester_id=semester.id).delete()
+    AtRiskStudent.query.filter_by(semester_id=semester.id).delete()
+    db.session.delete(semester)
+    schedule_changed()
+    enqueue_at_risk(select(Student.id))
+    db.session.commit()
+    flash("Семестр удален", "warning")
+    return redirect(url_for('semesters.list'))
+
+
+@bp.cli.command('regenerate-occurrences')
+def regenerate_occurrences_command():
+    """
+    Пересобирает даты проведения занятий по всем семестрам.
+    
+    Запуск: flask semesters regenerate-occurrences
+    """
+    created = regenerate_occurrences()
+    schedule_changed()
+    db.session.commit()
+    print(f"Даты занятий пересобраны: {created} строк")
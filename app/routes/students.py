@@ -1,17 +1,56 @@
 """
 Маршруты для управления студентами.
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+import io
+import click
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify
 from app import db
 from app.models.student import Student
 from app.models.user import User
 from app.models.group import Group
 from app.utils.decorators import admin_required
-from app.models.attendance import Attendance
+from app.utils.cache import invalidate_report_cache, invalidate_group_admin
+from app.utils.deletion import delete_students
+from app.utils.user_search import search_condition
+from app.utils.enrollment import import_students, transfer_students
 
 # Создаем Blueprint
 bp = Blueprint('students', __name__)
 
+def _available_users(search="", after=None):
+    """
+    Пользователи с ролью student, еще не привязанные к студенту.
+    
+    Выбирается одна страница в порядке логина запросом с анти-соединением
+    (LEFT JOIN students ... WHERE students.id IS NULL); следующая страница
+    начинается после последнего показанного логина, поэтому стоимость
+    страницы не зависит от общего числа пользователей.
+    
+    Args:
+        search (str): Строка поиска по логину, имени и фамилии
+        after (str, optional): Логин, после которого начинается страница
+        
+    Returns:
+        tuple: (пользователи страницы, логин для следующей страницы или None)
+    """
+    per_page = current_app.config['USERS_PER_PAGE']
+    query = User.query.outerjoin(
+        Student, Student.user_id == User.id
+    ).filter(
+        User.role == "student",
+        Student.id.is_(None)
+    )
+    search = search.strip()
+    if search:
+        query = query.filter(search_condition(search))
+    if after:
+        query = query.filter(User.username > after)
+    
+    users = query.order_by(User.username).limit(per_page + 1).all()
+    next_after = users[per_page - 1].username if len(users) > per_page else None
+    return users[:per_page], next_after
+
+
 @bp.route('/')
 @admin_required
 def list():
@@ -51,19 +90,44 @@ def create():
             is_group_admin=is_group_admin
         )
         db.session.add(student)
+        invalidate_report_cache(group_id)
+        invalidate_group_admin(user_id)
         db.session.commit()
         flash("Студент создан", "success")
         return redirect(url_for('students.list'))
     
-    # Получаем пользователей с ролью student, которые ещё не являются студентами
-    users = User.query.filter_by(role="student").all()
-    available_users = []
-    for user in users:
-        if not user.student:
-            available_users.append(user)
-    
+    # Первая страница пользователей с ролью student, которые ещё не являются студентами
+    users, next_after = _available_users(request.args.get("search", ""))
     groups = Group.query.all()
-    return render_template("students/create.html", users=available_users, groups=groups)
+    return render_template(
+        "students/create.html",
+        users=users,
+        next_after=next_after,
+        search=request.args.get("search", ""),
+        groups=groups
+    )
+
+
+@bp.route('/available-users')
+@admin_required
+def available_users():
+    """
+    Страница пользователей для выбора при создании студента (JSON).
+    
+    Параметры запроса: search - строка поиска, after - логин последнего
+    полученного пользователя.
+    
+    Returns:
+        Response: {"users": [{"id", "label"}], "next_after": логин или null}
+    """
+    users, next_after = _available_users(request.args.get("search", ""), request.args.get("after") or None)
+    return jsonify(
+        users=[
+            {"id": user.id, "label": " ".join(filter(None, [user.first_name, user.last_name, f"({user.username})"]))}
+            for user in users
+        ],
+        next_after=next_after
+    )
 
 
 @bp.route('/edit/<int:id>', methods=["GET", "POST"])
@@ -80,8 +144,11 @@ def edit(id):
     """
     student = Student.query.get_or_404(id)
     if request.method == "POST":
+        invalidate_report_cache(student.group_id)
         student.group_id = int(request.form["group_id"])
         student.is_group_admin = request.form.get("is_group_admin") == "on"
+        invalidate_report_cache(student.group_id)
+        invalidate_group_admin(student.user_id)
         db.session.commit()
         flash("Данные студента обновлены", "success")
         return redirect(url_for('students.list'))
@@ -104,12 +171,108 @@ def delete(id):
         Response: Перенаправление на список студентов
     """
     student = Student.query.get_or_404(id)
+    delete_students([student.id])
+    flash("Студент удален", "warning")
+    return redirect(url_for('students.list'))
+
+
+@bp.route('/transfer', methods=["GET", "POST"])
+@admin_required
+def transfer():
+    """
+    Перевод выбранных студентов группы в другую группу.
     
-    # Сначала удаляем все записи посещаемости для этого студента
-    Attendance.query.filter_by(student_id=student.id).delete()
+    Returns:
+        str или Response: Отрендеренный шаблон формы или перенаправление на список
+    """
+    if request.method == "POST":
+        student_ids = request.form.getlist("student_ids", type=int)
+        group_id = request.form.get("group_id", type=int)
+        group_admin = request.form.get("group_admin", "")
+        if not student_ids or not group_id:
+            flash("Выберите студентов и группу назначения", "danger")
+            return redirect(url_for('students.transfer', source_group_id=request.form.get("source_group_id")))
+        
+        try:
+            moved = transfer_students(
+                student_ids,
+                group_id,
+                group_admin_id=int(group_admin) if group_admin.isdigit() else None,
+                clear_admins=group_admin == "clear"
+            )
+        except ValueError as error:
+            flash(str(error), "danger")
+            return redirect(url_for('students.transfer', source_group_id=request.form.get("source_group_id")))
+        flash(f"Переведено студентов: {moved}", "success")
+        return redirect(url_for('students.list'))
     
-    # Затем удаляем самого студента
-    db.session.delete(student)
-    db.session.commit()
-    flash("Студент удален", "warning")
-    return redirect(url_for('students.list')) 
\ No newline at end of file
+    source_group_id = request.args.get("source_group_id", type=int)
+    students = []
+    if source_group_id:
+        students = db.session.query(
+            Student.id, Student.is_group_admin, User.username, User.first_name, User.last_name
+        ).join(
+            User, Student.user_id == User.id
+        ).filter(
+            Student.group_id == source_group_id
+        ).order_by(User.last_name, User.first_name).all()
+    groups = db.session.query(Group.id, Group.name).order_by(Group.name).all()
+    return render_template(
+        "students/transfer.html",
+        groups=groups,
+        students=students,
+        source_group_id=source_group_id
+    )
+
+
+@bp.route('/import', methods=["GET", "POST"])
+@admin_required
+def import_csv():
+    """
+    Массовое зачисление студентов из CSV-файла.
+    
+    Returns:
+        str: Отрендеренный шаблон формы загрузки с результатом импорта
+    """
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if not upload or not upload.filename:
+            flash("Выберите файл для импорта", "danger")
+            return redirect(url_for('students.import_csv'))
+        
+        stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+        try:
+            created, errors = import_students(stream)
+        except (ValueError, UnicodeDecodeError) as error:
+            flash(f"Не удалось прочитать файл: {error}", "danger")
+            return redirect(url_for('students.import_csv'))
+        
+        flash(f"Зачислено студентов: {created}", "success" if created else "warning")
+        return render_template("students/import.html", created=created, errors=errors)
+    return render_template("students/import.html", created=None, errors=[])
+
+
+@bp.cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', type=int, default=None, help='Строк в пакете')
+@click.option('--workers', type=int, default=None, help='Процессов хеширования паролей')
+def import_command(path, batch_size, workers):
+    """
+    Зачисляет студентов из CSV-файла с выводом хода импорта.
+    
+    Запуск: flask students import FILE [--batch-size 500] [--workers 8]
+    """
+    with open(path, encoding="utf-8-sig", newline="") as stream:
+        try:
+            created, errors = import_students(
+                stream,
+                batch_size=batch_size,
+                workers=workers,
+                progress=lambda done, processed: print(f"Обработано строк: {processed}, зачислено: {done}")
+            )
+        except ValueError as error:
+            raise click.ClickException(str(error))
+    
+    for line, username, message in errors:
+        print(f"Строка {line} ({username}): {message}")
+    print(f"Зачислено студентов: {created}, ошибок: {len(errors)}")
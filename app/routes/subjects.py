@@ -2,26 +2,83 @@
 Маршруты для управления предметами.
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash
+from sqlalchemy import select, func, false
 from app import db
-from app.models.subject import Subject
+from app.models.attendance_daily import AttendanceDaily
 from app.models.lesson import Lesson
-from app.models.attendance import Attendance
+from app.models.semester import Semester
+from app.models.subject import Subject
 from app.utils.decorators import admin_required
+from app.utils.cache import invalidate_report_cache
+from app.utils.deletion import delete_subject
+from app.utils.helpers import calculate_attendance_percentage
+from app.utils.schedule import schedule_changed
 
 # Создаем Blueprint
 bp = Blueprint('subjects', __name__)
 
+
+def _subjects_with_stats(semester):
+    """
+    Загружает предметы с количеством групп и занятий в расписании и
+    посещаемостью за семестр одним запросом.
+    
+    Args:
+        semester (Semester): Семестр; None - посещаемость не считается
+    
+    Returns:
+        list: Строки с полями subject, groups, lessons, total, presents, rate
+    """
+    lessons = select(
+        Lesson.subject_id,
+        func.count(func.distinct(Lesson.group_id)).label("groups"),
+        func.count(Lesson.id).label("lessons")
+    ).group_by(Lesson.subject_id).subquery()
+    marks = select(
+        AttendanceDaily.subject_id,
+        func.sum(AttendanceDaily.total).label("total"),
+        func.sum(AttendanceDaily.present).label("presents")
+    ).where(
+        AttendanceDaily.date.between(semester.start_date, semester.end_date) if semester else false()
+    ).group_by(AttendanceDaily.subject_id).subquery()
+    
+    rows = db.session.execute(
+        select(
+            Subject,
+            func.coalesce(lessons.c.groups, 0).label("groups"),
+            func.coalesce(lessons.c.lessons, 0).label("lessons"),
+            func.coalesce(marks.c.total, 0).label("total"),
+            func.coalesce(marks.c.presents, 0).label("presents")
+        ).outerjoin(
+            lessons, lessons.c.subject_id == Subject.id
+        ).outerjoin(
+            marks, marks.c.subject_id == Subject.id
+        ).order_by(Subject.name)
+    ).all()
+    return [
+        dict(
+            subject=row.Subject,
+            groups=row.groups,
+            lessons=row.lessons,
+            total=row.total,
+            presents=row.presents,
+            rate=round(calculate_attendance_percentage(row.presents, row.total), 1)
+        )
+        for row in rows
+    ]
+
+
 @bp.route('/')
 @admin_required
 def list():
     """
-    Список предметов.
+    Список предметов с количеством групп, занятий и посещаемостью.
     
     Returns:
         str: Отрендеренный шаблон списка предметов
     """
-    subjects = Subject.query.all()
-    return render_template("subjects/list.html", subjects=subjects)
+    semester = Semester.current()
+    return render_template("subjects/list.html", subjects=_subjects_with_stats(semester), semester=semester)
 
 
 @bp.route('/create', methods=["GET", "POST"])
@@ -36,6 +93,7 @@ def create():
     if request.method == "POST":
         subject = Subject(name=request.form["name"])
         db.session.add(subject)
+        invalidate_report_cache()
         db.session.commit()
         flash("Предмет создан", "success")
         return redirect(url_for('subjects.list'))
@@ -57,6 +115,8 @@ def edit(id):
     subject = Subject.query.get_or_404(id)
     if request.method == "POST":
         subject.name = request.form["name"]
+        invalidate_report_cache()
+        schedule_changed()
         db.session.commit()
         flash("Данные предмета обновлены", "success")
         return redirect(url_for('subjects.list'))
@@ -76,22 +136,6 @@ def delete(id):
         Response: Перенаправление на список предметов
     """
     subject = Subject.query.get_or_404(id)
-    
-    # Сначала удаляем все связанные записи
-    lessons = Lesson.query.filter_by(subject_id=subject.id).all()
-    lesson_ids = [lesson.id for lesson in lessons]
-    
-    # Удаляем записи посещаемости для этих занятий
-    if lesson_ids:
-        Attendance.query.filter(Attendance.lesson_id.in_(lesson_ids)).delete(synchronize_session=False)
-    
-    # Удаляем занятия по предмету
-    if lessons:
-        for lesson in lessons:
-            db.session.delete(lesson)
-    
-    # Затем удаляем сам предмет
-    db.session.delete(subject)
-    db.session.commit()
-    flash("Предмет удален", "warning")
+    counts = delete_subject(subject.id)
+    flash(f"Предмет удален (занятий: {counts['lessons']}, отметок: {counts['attendance']})", "warning")
     return redirect(url_for('subjects.list')) 
\ No newline at end of file
@@ -1,38 +1,34 @@
 """
 Маршруты для управления пользователями.
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from werkzeug.security import generate_password_hash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from app import db
 from app.models.user import User
-from app.models.student import Student
-from app.models.attendance import Attendance
 from app.utils.decorators import admin_required
+from app.utils.cache import invalidate_report_cache
+from app.utils.deletion import delete_user
+from app.utils.passwords import PasswordHashingBusy
+from app.utils.user_search import search_users
 
 # Создаем Blueprint
 bp = Blueprint('users', __name__)
 
+# Сообщение, когда все слоты хеширования паролей заняты (см. app.utils.passwords)
+BUSY_MESSAGE = "Сервер занят вычислением паролей, попробуйте через несколько секунд"
+
 @bp.route('/')
 @admin_required
 def list():
     """
-    Список пользователей с возможностью поиска.
+    Список пользователей с постраничным поиском по индексу.
     
     Returns:
         str: Отрендеренный шаблон списка пользователей
     """
     search = request.args.get("search", "")
-    if search:
-        users = User.query.filter(
-            db.or_(
-                User.username.contains(search),
-                User.first_name.contains(search),
-                User.last_name.contains(search)
-            )
-        ).all()
-    else:
-        users = User.query.all()
-    return render_template("users/list.html", users=users)
+    page = max(request.args.get("page", 1, type=int), 1)
+    users, has_next = search_users(search, page, current_app.config['USERS_PER_PAGE'])
+    return render_template("users/list.html", users=users, search=search, page=page, has_next=has_next)
 
 
 @bp.route('/create', methods=["GET", "POST"])
@@ -45,13 +41,17 @@ def create():
         str или Response: Отрендеренный шаблон формы или перенаправление на список
     """
     if request.method == "POST":
-        user = User(
-            username=request.form["username"],
-            password=request.form["password"],
-            role=request.form["role"],
-            first_name=request.form.get("first_name"),
-            last_name=request.form.get("last_name"),
-        )
+        try:
+            user = User(
+                username=request.form["username"],
+                password=request.form["password"],
+                role=request.form["role"],
+                first_name=request.form.get("first_name"),
+                last_name=request.form.get("last_name"),
+            )
+        except PasswordHashingBusy:
+            flash(BUSY_MESSAGE, "warning")
+            return render_template("users/create.html"), 503
         db.session.add(user)
         db.session.commit()
         flash("Пользователь создан", "success")
@@ -80,7 +80,17 @@ def edit(id):
         
         # Обновляем пароль только если он был введен
         if request.form.get("password"):
-            user.password = generate_password_hash(request.form["password"])
+            try:
+                user.set_password(request.form["password"])
+            except PasswordHashingBusy:
+                # Отменяем уже присвоенные поля, чтобы форма показала сохраненные данные
+                db.session.rollback()
+                flash(BUSY_MESSAGE, "warning")
+                return render_template("users/edit.html", user=user), 503
+        
+        # Имя студента отображается в отчетах его группы
+        if user.student:
+            invalidate_report_cache(user.student.group_id)
             
         db.session.commit()
         flash("Данные пользователя обновлены", "success")
@@ -101,18 +111,6 @@ def delete(id):
         Response: Перенаправление на список пользователей
     """
     user = User.query.get_or_404(id)
-    
-    # Проверяем, является ли пользователь студентом
-    student = Student.query.filter_by(user_id=user.id).first()
-    if student:
-        # Удаляем записи посещаемости для этого студента
-        Attendance.query.filter_by(student_id=student.id).delete()
-        
-        # Удаляем запись студента
-        db.session.delete(student)
-    
-    # Затем удаляем самого пользователя
-    db.session.delete(user)
-    db.session.commit()
+    delete_user(user.id)
     flash("Пользователь удален", "warning")
     return redirect(url_for('users.list')) 
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""
+Пересчет списка студентов группы риска (таблица at_risk_students).
+"""
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, insert, delete, func, or_, true
+from app import db
+from app.models.attendance import Attendance
+from app.models.attendance_daily import AttendanceDaily
+from app.models.at_risk_queue import AtRiskQueue
+from app.models.at_risk_student import AtRiskStudent
+from app.models.semester import Semester
+from app.models.student import Student
+from app.utils.helpers import calculate_attendance_percentage
+
+
+def enqueue_at_risk(student_ids):
+    """
+    Ставит студентов в очередь пересчета группы риска.
+    
+    Вызывается в той же транзакции, что и изменение посещаемости.
+    
+    Args:
+        student_ids: Список идентификаторов или запрос select(), возвращающий их
+    """
+    if hasattr(student_ids, "subquery"):
+        db.session.execute(insert(AtRiskQueue).from_select(["student_id"], student_ids))
+    elif student_ids:
+        db.session.execute(insert(AtRiskQueue), [{"student_id": student_id} for student_id in student_ids])
+
+
+def _semester_stats(student_ids, start_date, end_date):
+    """
+    Загружает показатели посещаемости студентов за семестр.
+    
+    Процент присутствия берется из дневной сводки, а пропуски подряд
+    считаются по исходным записям после последней отметки, отличной от пропуска.
+    
+    Args:
+        student_ids (list): Идентификаторы студентов
+        start_date (datetime.date): Начало семестра
+        end_date (datetime.date): Конец семестра
+    
+    Returns:
+        tuple: (словарь student_id -> (всего, присутствий), словарь student_id -> пропусков подряд)
+    """
+    totals = {
+        student_id: (int(total), int(presents))
+        for student_id, total, presents in db.session.execute(
+            select(
+                AttendanceDaily.student_id,
+                func.sum(AttendanceDaily.total),
+                func.sum(AttendanceDaily.present)
+            ).where(
+                AttendanceDaily.student_id.in_(student_ids),
+                AttendanceDaily.date.between(start_date, end_date)
+            ).group_by(AttendanceDaily.student_id)
+        )
+    }
+    
+    semester_marks = (
+        Attendance.student_id.in_(student_ids),
+        Attendance.date.between(start_date, end_date)
+    )
+    last_attended = select(
+        Attendance.student_id,
+        func.max(Attendance.date).label("last_date")
+    ).where(
+        *semester_marks,
+        Attendance.status != Attendance.STATUS_ABSENT
+    ).group_by(Attendance.student_id).subquery()
+    
+    streaks = dict(db.session.execute(
+        select(
+            Attendance.student_id,
+            func.count(Attendance.id)
+        ).outerjoin(
+            last_attended, last_attended.c.student_id == Attendance.student_id
+        ).where(
+            *semester_marks,
+            Attendance.status == Attendance.STATUS_ABSENT,
+            or_(last_attended.c.last_date.is_(None), Attendance.date > last_attended.c.last_date)
+        ).group_by(Attendance.student_id)
+    ).all())
+    
+    return totals, streaks
+
+
+def _refresh_batch(student_ids, semester):
+    """
+    Пересчитывает строки группы риска для части студентов.
+    
+    Args:
+        student_ids (list): Идентификаторы студентов
+        semester (Semester): Текущий семестр
+    """
+    config = current_app.config
+    totals, streaks = _semester_stats(student_ids, semester.start_date, semester.end_date)
+    
+    # Удаленные студенты остаются в очереди, но не попадают в список
+    existing = db.session.scalars(select(Student.id).where(Student.id.in_(student_ids))).all()
+    
+    db.session.execute(
+        delete(AtRiskStudent).where(AtRiskStudent.student_id.in_(student_ids)),
+        execution_options={"synchronize_session": False}
+    )
+    
+    now = datetime.utcnow()
+    rows = []
+    for student_id in existing:
+        total, presents = totals.get(student_id, (0, 0))
+        rate = calculate_attendance_percentage(presents, total)
+        streak = streaks.get(student_id, 0)
+        low_rate = total >= config['AT_RISK_MIN_MARKS'] and rate < config['AT_RISK_MIN_RATE']
+        if low_rate or streak >= config['AT_RISK_ABSENCE_STREAK']:
+            rows.append(dict(
+                student_id=student_id,
+                semester_id=semester.id,
+                total=total,
+                presents=presents,
+                presence_rate=round(rate, 1),
+                absence_streak=streak,
+                updated_at=now
+            ))
+    
+    if rows:
+        db.session.execute(insert(AtRiskStudent), rows)
+
+
+def refresh_at_risk(batch_size=500, full=False):
+    """
+    Пересчитывает список группы риска по изменениям с прошлого запуска.
+    
+    Обрабатывает студентов из очереди at_risk_queue до зафиксированной на
+    старте границы, поэтому изменения, сделанные во время пересчета,
+    попадут в следующий запуск. Каждая порция фиксируется отдельной
+    транзакцией; прерванный пересчет безопасно повторить.
+    
+    Границы берутся из семестра таблицы semesters, в который попадает
+    сегодняшняя дата. Вне семестров список очищается, а очередь
+    разбирается без пересчета.
+    
+    Args:
+        batch_size (int): Количество студентов в одной порции
+        full (bool): Пересчитать всех студентов, а не только измененных
+    
+    Returns:
+        int: Количество пересчитанных студентов
+    """
+    semester = Semester.current()
+    
+    # Строки другого семестра больше не актуальны; вне семестров список пуст
+    stale = AtRiskStudent.semester_id != semester.id if semester else true()
+    db.session.execute(
+        delete(AtRiskStudent).where(stale),
+        execution_options={"synchronize_session": False}
+    )
+    if full:
+        enqueue_at_risk(select(Student.id))
+    db.session.commit()
+    
+    watermark = db.session.scalar(select(func.max(AtRiskQueue.id)))
+    if watermark is None:
+        return 0
+    
+    processed = 0
+    last_student_id = 0
+    while semester is not None:
+        student_ids = db.session.scalars(
+            select(AtRiskQueue.student_id).where(
+                AtRiskQueue.id <= watermark,
+                AtRiskQueue.student_id > last_student_id
+            ).distinct().order_by(AtRiskQueue.student_id).limit(batch_size)
+        ).all()
+        if not student_ids:
+            break
+        
+        _refresh_batch(student_ids, semester)
+        db.session.commit()
+        processed += len(student_ids)
+        last_student_id = student_ids[-1]
+    
+    db.session.execute(delete(AtRiskQueue).where(AtRiskQueue.id <= watermark))
+    db.session.commit()
+    return processed
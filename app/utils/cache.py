@@ -0,0 +1,266 @@
+"""
+Кэш результатов отчетов с инвалидацией по поколениям групп.
+"""
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.utils import metrics
+
+
+class TTLCache:
+    """
+    Потокобезопасный LRU-кэш с ограничением времени жизни записей.
+    
+    Attributes:
+        name (str): Имя кэша для метрик (<name>.hit, <name>.miss)
+        max_size (int): Максимальное количество записей
+        ttl (int): Время жизни записи в секундах
+    """
+    
+    def __init__(self, name, max_size=256, ttl=300):
+        """
+        Инициализация кэша.
+        
+        Args:
+            name (str): Имя кэша для метрик
+            max_size (int): Максимальное количество записей
+            ttl (int): Время жизни записи в секундах
+        """
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """
+        Возвращает значение из кэша.
+        
+        Args:
+            key: Ключ записи
+            
+        Returns:
+            Значение или None, если записи нет или она устарела
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > time.monotonic():
+                self._data.move_to_end(key)
+                metrics.increment(f"{self.name}.hit")
+                return item[1]
+            if item is not None:
+                del self._data[key]
+        metrics.increment(f"{self.name}.miss")
+        return None
+    
+    def set(self, key, value):
+        """
+        Сохраняет значение в кэше, вытесняя самые давно использованные записи.
+        
+        Args:
+            key: Ключ записи
+            value: Значение
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+    
+    def configure(self, max_size, ttl):
+        """
+        Изменяет параметры кэша и очищает его.
+        
+        Args:
+            max_size (int): Максимальное количество записей
+            ttl (int): Время жизни записи в секундах
+        """
+        with self._lock:
+            self.max_size = max_size
+            self.ttl = ttl
+            self._data.clear()
+    
+    def __len__(self):
+        """
+        Количество записей в кэше.
+        """
+        return len(self._data)
+
+
+# Кэш отчетов по посещаемости
+report_cache = TTLCache("report_cache")
+
+# Кэш принадлежности студентов к группам (группа, признак старосты) для
+# декораторов прав доступа и сессии; время жизни ограничивает устаревание
+# в других процессах, которые не видят сброс версии
+group_admin_cache = TTLCache("group_admin_cache", max_size=4096, ttl=60)
+
+# Кэш расписания занятий по группам
+timetable_cache = TTLCache("timetable_cache", max_size=512, ttl=3600)
+
+# Отрендеренные календарные ленты по (группа, версия расписания)
+feed_cache = TTLCache("feed_cache", max_size=256, ttl=3600)
+
+
+class GroupGenerations:
+    """
+    Поколения данных по группам: изменение группы увеличивает ее счетчик,
+    поэтому записи кэша со старым поколением в ключе больше не находятся.
+    """
+    
+    def __init__(self):
+        """
+        Инициализация счетчиков.
+        """
+        self._lock = threading.Lock()
+        self._groups = {}
+        self._any = 0
+        self._global = 0
+    
+    def get(self, group_id=None):
+        """
+        Возвращает поколение данных для ключа кэша.
+        
+        Args:
+            group_id (int, optional): Идентификатор группы; None - данные всех групп
+            
+        Returns:
+            tuple: Поколение данных
+        """
+        with self._lock:
+            if group_id is None:
+                return (self._any,)
+            return (self._groups.get(int(group_id), 0), self._global)
+    
+    def bump(self, group_ids):
+        """
+        Увеличивает поколения указанных групп.
+        
+        Args:
+            group_ids (set): Идентификаторы групп; None в наборе означает все группы
+        """
+        with self._lock:
+            self._any += 1
+            if None in group_ids:
+                self._global += 1
+            for group_id in group_ids:
+                if group_id is not None:
+                    group_id = int(group_id)
+                    self._groups[group_id] = self._groups.get(group_id, 0) + 1
+
+
+_report_generations = GroupGenerations()
+_timetable_generations = GroupGenerations()
+_generations_lock = threading.Lock()
+
+
+def report_generation(group_id=None):
+    """
+    Возвращает поколение данных для ключа кэша отчета.
+    
+    Args:
+        group_id (int, optional): Идентификатор группы; None - отчет по всем группам
+        
+    Returns:
+        tuple: Поколение данных
+    """
+    return _report_generations.get(group_id)
+
+
+def invalidate_report_cache(group_id=None):
+    """
+    Помечает группу для сброса кэша отчетов после фиксации транзакции.
+    
+    Поколение увеличивается только после commit, чтобы параллельный
+    запрос не сохранил в кэш данные, прочитанные до фиксации.
+    
+    Args:
+        group_id (int, optional): Идентификатор группы; None - все группы
+    """
+    db.session.info.setdefault("report_cache_groups", set()).add(group_id)
+
+
+def timetable_generation(group_id=None):
+    """
+    Возвращает поколение расписания для ключа кэша.
+    
+    Args:
+        group_id (int, optional): Идентификатор группы; None - расписание всех групп
+        
+    Returns:
+        tuple: Поколение данных
+    """
+    return _timetable_generations.get(group_id)
+
+
+def invalidate_timetable(group_id=None):
+    """
+    Помечает группу для сброса кэша расписания после фиксации транзакции.
+    
+    Args:
+        group_id (int, optional): Идентификатор группы; None - все группы
+    """
+    db.session.info.setdefault("timetable_groups", set()).add(group_id)
+
+
+# Версии пользователей для кэша старост
+_user_versions = {}
+
+
+def group_admin_version(user_id):
+    """
+    Возвращает версию данных студента для ключа кэша старост.
+    
+    Args:
+        user_id (int): Идентификатор пользователя
+        
+    Returns:
+        int: Версия
+    """
+    with _generations_lock:
+        return _user_versions.get(int(user_id), 0)
+
+
+def invalidate_group_admin(user_id):
+    """
+    Помечает пользователя для сброса кэша старост после фиксации транзакции.
+    
+    Вызывается при изменении группы или признака старосты студента.
+    
+    Args:
+        user_id (int): Идентификатор пользователя
+    """
+    db.session.info.setdefault("group_admin_users", set()).add(int(user_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    """
+    Применяет отложенные сбросы кэшей после фиксации транзакции.
+    """
+    group_ids = session.info.pop("report_cache_groups", None)
+    if group_ids:
+        _report_generations.bump(group_ids)
+    
+    group_ids = session.info.pop("timetable_groups", None)
+    if group_ids:
+        _timetable_generations.bump(group_ids)
+    
+    user_ids = session.info.pop("group_admin_users", None)
+    if user_ids:
+        with _generations_lock:
+            for user_id in user_ids:
+                _user_versions[user_id] = _user_versions.get(user_id, 0) + 1
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    """
+    Отменяет отложенные сбросы кэшей при откате транзакции.
+    """
+    session.info.pop("report_cache_groups", None)
+    session.info.pop("timetable_groups", None)
+    session.info.pop("group_admin_users", None)
@@ -5,6 +5,73 @@ from functools import wraps
 from flask import session, redirect, url_for, flash, request
 from app.models.student import Student
 from app import db
+from app.utils.cache import group_admin_cache, group_admin_version
+
+
+def _student_membership(user_id):
+    """
+    Возвращает группу студента и признак старосты.
+    
+    Результат кэшируется в процессе по идентификатору пользователя и версии
+    его данных, поэтому проверка прав не обращается к базе на каждый запрос.
+    
+    Args:
+        user_id (int): Идентификатор пользователя
+    
+    Returns:
+        tuple: (идентификатор студента, идентификатор группы, староста ли)
+        или пустой кортеж, если пользователь не студент
+    """
+    cache_key = (user_id, group_admin_version(user_id))
+    membership = group_admin_cache.get(cache_key)
+    if membership is None:
+        student = db.session.query(
+            Student.id, Student.group_id, Student.is_group_admin
+        ).filter_by(user_id=user_id).first()
+        # Пустой кортеж кэширует отрицательный ответ, так как None означает промах
+        membership = (student.id, student.group_id, bool(student.is_group_admin)) if student else ()
+        group_admin_cache.set(cache_key, membership)
+    return membership
+
+
+def _group_admin_group_id(user_id):
+    """
+    Возвращает группу, старостой которой является пользователь.
+    
+    Args:
+        user_id (int): Идентификатор пользователя
+    
+    Returns:
+        int или None: Идентификатор группы или None, если пользователь не староста
+    """
+    membership = _student_membership(user_id)
+    return membership[1] if membership and membership[2] else None
+
+
+def refresh_student_session():
+    """
+    Обновляет в сессии студента группу и признак старосты.
+    
+    Сессия заполняется при входе, а перевод в другую группу или смена
+    старосты происходит без участия студента. Значения берутся из кэша
+    принадлежности, который сбрасывается при таких изменениях, поэтому
+    обычный запрос не обращается к базе. Вызывается перед каждым запросом.
+    """
+    if session.get('user_role') != 'student' or 'user_id' not in session:
+        return
+    membership = _student_membership(session['user_id'])
+    if not membership:
+        # Запись студента удалена или отвязана: права старосты и доступ
+        # к группе не должны сохраняться в сессии
+        session.pop('student_id', None)
+        session.pop('group_id', None)
+        session.pop('is_group_admin', None)
+        return
+    student_id, group_id, is_group_admin = membership
+    if (session.get('student_id'), session.get('group_id'), session.get('is_group_admin')) != membership:
+        session['student_id'] = student_id
+        session['group_id'] = group_id
+        session['is_group_admin'] = is_group_admin
 
 
 def login_required(f):
@@ -81,8 +148,7 @@ def group_admin_required(f):
             return redirect(url_for('main.index'))
         
         # Проверяем, является ли студент старостой группы
-        student = Student.query.filter_by(user_id=session['user_id'], is_group_admin=True).first()
-        if not student:
+        if not _group_admin_group_id(session['user_id']):
             flash('Эта страница доступна только для старост группы', 'danger')
             return redirect(url_for('main.index'))
             
@@ -112,10 +178,10 @@ def admin_or_group_admin_required(f):
             
         # Проверка на старосту группы
         if session['user_role'] == 'student':
-            student = Student.query.filter_by(user_id=session['user_id'], is_group_admin=True).first()
-            if student:
+            group_id = _group_admin_group_id(session['user_id'])
+            if group_id:
                 # Добавим ID группы в kwargs для дальнейшего использования
-                kwargs['group_admin_group_id'] = student.group_id
+                kwargs['group_admin_group_id'] = group_id
                 return f(*args, **kwargs)
                 
         flash('У вас нет прав для доступа к этой странице', 'danger')
@@ -0,0 +1,276 @@
+"""
+Каскадное удаление групп, предметов, занятий, студентов и пользователей.
+
+Зависимые записи удаляются множественными запросами DELETE ... WHERE в
+порядке зависимостей, порциями ограниченного размера с фиксацией после
+каждой порции, поэтому удаление большой группы не держит блокировку
+записи на все время работы. Родительская запись удаляется последней:
+если удаление прервалось, его можно просто повторить.
+"""
+from collections import Counter
+from flask import current_app
+from sqlalchemy import select, delete
+from app import db
+from app.models.attendance import Attendance
+from app.models.attendance_daily import AttendanceDaily
+from app.models.at_risk_queue import AtRiskQueue
+from app.models.at_risk_student import AtRiskStudent
+from app.models.group import Group
+from app.models.lesson import Lesson
+from app.models.lesson_occurrence import LessonOccurrence
+from app.models.student import Student
+from app.models.subject import Subject
+from app.models.user import User
+from app.utils.cache import invalidate_report_cache, invalidate_group_admin
+from app.utils.at_risk import enqueue_at_risk
+from app.utils.rollup import refresh_rollup
+from app.utils.schedule import schedule_changed
+
+# Количество родительских ключей (студентов, занятий) в одной порции
+KEY_BATCH_SIZE = 500
+
+
+def _batches(ids, size=KEY_BATCH_SIZE):
+    """
+    Делит список идентификаторов на порции.
+    
+    Args:
+        ids (list): Идентификаторы
+        size (int): Размер порции
+    
+    Yields:
+        list: Порция идентификаторов
+    """
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _execute_delete(model, condition, counts, progress):
+    """
+    Выполняет один запрос удаления и учитывает удаленные строки.
+    
+    Args:
+        model: Модель таблицы
+        condition: Условие WHERE
+        counts (Counter): Счетчики удаленных строк по таблицам
+        progress (function, optional): Функция progress(таблица, удалено всего)
+    """
+    result = db.session.execute(
+        delete(model).where(condition),
+        execution_options={"synchronize_session": False}
+    )
+    if result.rowcount:
+        table = model.__tablename__
+        counts[table] += result.rowcount
+        if progress:
+            progress(table, counts[table])
+
+
+def _delete_attendance(condition, counts, progress):
+    """
+    Удаляет записи посещаемости порциями по первичному ключу.
+    
+    Порция выбирается отдельным запросом, так как MySQL не разрешает
+    LIMIT в подзапросе к удаляемой таблице.
+    
+    Args:
+        condition: Условие отбора записей attendance
+        counts (Counter): Счетчики удаленных строк по таблицам
+        progress (function, optional): Функция progress(таблица, удалено всего)
+    """
+    chunk_size = current_app.config['DELETE_CHUNK_SIZE']
+    while True:
+        ids = db.session.scalars(select(Attendance.id).where(condition).limit(chunk_size)).all()
+        if not ids:
+            return
+        _execute_delete(Attendance, Attendance.id.in_(ids), counts, progress)
+        db.session.commit()
+        if len(ids) < chunk_size:
+            return
+
+
+def _delete_students(student_ids, counts, progress):
+    """
+    Удаляет студентов вместе с их посещаемостью, сводкой и группой риска.
+    
+    Args:
+        student_ids (list): Идентификаторы студентов
+        counts (Counter): Счетчики удаленных строк по таблицам
+        progress (function, optional): Функция progress(таблица, удалено всего)
+    """
+    for batch in _batches(student_ids):
+        rows = db.session.execute(
+            select(Student.user_id, Student.group_id).where(Student.id.in_(batch))
+        ).all()
+        
+        # Сначала производные таблицы, чтобы отчеты не видели посещаемость без сводки
+        _execute_delete(AttendanceDaily, AttendanceDaily.student_id.in_(batch), counts, progress)
+        _execute_delete(AtRiskStudent, AtRiskStudent.student_id.in_(batch), counts, progress)
+        _execute_delete(AtRiskQueue, AtRiskQueue.student_id.in_(batch), counts, progress)
+        for group_id in {row.group_id for row in rows}:
+            invalidate_report_cache(group_id)
+        db.session.commit()
+        
+        _delete_attendance(Attendance.student_id.in_(batch), counts, progress)
+        
+        _execute_delete(Student, Student.id.in_(batch), counts, progress)
+        for row in rows:
+            invalidate_group_admin(row.user_id)
+        db.session.commit()
+
+
+def _delete_lessons(lesson_ids, counts, progress, refresh=True):
+    """
+    Удаляет занятия вместе с их посещаемостью и датами проведения.
+    
+    Сводка пересчитывается только для студентов, отмеченных на удаляемых
+    занятиях, и только по предметам этих занятий.
+    
+    Args:
+        lesson_ids (list): Идентификаторы занятий
+        counts (Counter): Счетчики удаленных строк по таблицам
+        progress (function, optional): Функция progress(таблица, удалено всего)
+        refresh (bool): Пересчитывать сводку; False, если сводка по
+            предметам занятий уже удалена вызывающим
+    """
+    for batch in _batches(lesson_ids):
+        lessons = db.session.execute(
+            select(Lesson.subject_id, Lesson.group_id).where(Lesson.id.in_(batch))
+        ).all()
+        student_ids = []
+        if refresh:
+            student_ids = db.session.scalars(
+                select(Attendance.student_id).where(Attendance.lesson_id.in_(batch)).distinct()
+            ).all()
+        
+        _delete_attendance(Attendance.lesson_id.in_(batch), counts, progress)
+        
+        if student_ids:
+            for subject_id in {lesson.subject_id for lesson in lessons}:
+                refresh_rollup(student_ids=student_ids, subject_id=subject_id)
+        
+        _execute_delete(LessonOccurrence, LessonOccurrence.lesson_id.in_(batch), counts, progress)
+        _execute_delete(Lesson, Lesson.id.in_(batch), counts, progress)
+        for group_id in {lesson.group_id for lesson in lessons}:
+            invalidate_report_cache(group_id)
+            schedule_changed(group_id)
+        db.session.commit()
+
+
+def delete_lessons(lesson_ids, progress=None):
+    """
+    Удаляет занятия.
+    
+    Args:
+        lesson_ids (iterable): Идентификаторы занятий
+        progress (function, optional): Функция progress(таблица, удалено всего)
+    
+    Returns:
+        Counter: Количество удаленных строк по таблицам
+    """
+    counts = Counter()
+    _delete_lessons(list(lesson_ids), counts, progress)
+    return counts
+
+
+def delete_students(student_ids, progress=None):
+    """
+    Удаляет студентов (учетные записи пользователей остаются).
+    
+    Args:
+        student_ids (iterable): Идентификаторы студентов
+        progress (function, optional): Функция progress(таблица, удалено всего)
+    
+    Returns:
+        Counter: Количество удаленных строк по таблицам
+    """
+    counts = Counter()
+    _delete_students(list(student_ids), counts, progress)
+    return counts
+
+
+def delete_user(user_id, progress=None):
+    """
+    Удаляет пользователя вместе с записью студента.
+    
+    Args:
+        user_id (int): Идентификатор пользователя
+        progress (function, optional): Функция progress(таблица, удалено всего)
+    
+    Returns:
+        Counter: Количество удаленных строк по таблицам
+    """
+    counts = Counter()
+    student_ids = db.session.scalars(select(Student.id).where(Student.user_id == user_id)).all()
+    _delete_students(student_ids, counts, progress)
+    
+    _execute_delete(User, User.id == user_id, counts, progress)
+    invalidate_group_admin(user_id)
+    db.session.commit()
+    return counts
+
+
+def delete_subject(subject_id, progress=None):
+    """
+    Удаляет предмет вместе со всеми его занятиями.
+    
+    Args:
+        subject_id (int): Идентификатор предмета
+        progress (function, optional): Функция progress(таблица, удалено всего)
+    
+    Returns:
+        Counter: Количество удаленных строк по таблицам
+    """
+    counts = Counter()
+    
+    # Сводка по предмету удаляется целиком, студенты с ней - в пересчет группы риска
+    student_ids = db.session.scalars(
+        select(AttendanceDaily.student_id).where(AttendanceDaily.subject_id == subject_id).distinct()
+    ).all()
+    for batch in _batches(student_ids):
+        enqueue_at_risk(batch)
+        _execute_delete(
+            AttendanceDaily,
+            (AttendanceDaily.subject_id == subject_id) & AttendanceDaily.student_id.in_(batch),
+            counts,
+            progress
+        )
+        db.session.commit()
+    invalidate_report_cache()
+    
+    lesson_ids = db.session.scalars(select(Lesson.id).where(Lesson.subject_id == subject_id)).all()
+    _delete_lessons(lesson_ids, counts, progress, refresh=False)
+    
+    _execute_delete(Subject, Subject.id == subject_id, counts, progress)
+    invalidate_report_cache()
+    db.session.commit()
+    return counts
+
+
+def delete_group(group_id, progress=None):
+    """
+    Удаляет группу вместе со студентами и занятиями.
+    
+    Учетные записи пользователей студентов остаются.
+    
+    Args:
+        group_id (int): Идентификатор группы
+        progress (function, optional): Функция progress(таблица, удалено всего)
+    
+    Returns:
+        Counter: Количество удаленных строк по таблицам
+    """
+    counts = Counter()
+    student_ids = db.session.scalars(select(Student.id).where(Student.group_id == group_id)).all()
+    _delete_students(student_ids, counts, progress)
+    
+    lesson_ids = db.session.scalars(select(Lesson.id).where(Lesson.group_id == group_id)).all()
+    _delete_lessons(lesson_ids, counts, progress)
+    
+    # Даты занятий, оставшиеся без занятий, не должны держать внешний ключ
+    _execute_delete(LessonOccurrence, LessonOccurrence.group_id == group_id, counts, progress)
+    _execute_delete(Group, Group.id == group_id, counts, progress)
+    invalidate_report_cache(group_id)
+    schedule_changed(group_id)
+    db.session.commit()
+    return counts
@@ -0,0 +1,286 @@
+"""
+Массовое зачисление студентов из CSV-файла и перевод между группами.
+"""
+import csv
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from sqlalchemy import select, insert, update, or_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.group import Group
+from app.models.student import Student
+from app.models.user import User
+from app.utils.cache import invalidate_report_cache, invalidate_group_admin
+from app.utils.passwords import hash_passwords
+
+# Обязательные колонки файла; имя задается колонками first_name и
+# last_name или одной колонкой name ("Имя Фамилия")
+REQUIRED_COLUMNS = ("username", "group", "password")
+
+
+def _open_reader(stream):
+    """
+    Создает читатель CSV, определяя разделитель (запятая или точка с
+    запятой) по строке заголовка.
+    
+    Args:
+        stream: Текстовый поток с CSV
+    
+    Returns:
+        csv.DictReader: Читатель строк файла
+    
+    Raises:
+        ValueError: Если в заголовке нет обязательных колонок
+    """
+    header = stream.readline()
+    try:
+        dialect = csv.Sniffer().sniff(header, delimiters=",;")
+    except csv.Error:
+        dialect = csv.excel
+    fieldnames = [name.strip().lower() for name in next(csv.reader([header], dialect), [])]
+    missing = [name for name in REQUIRED_COLUMNS if name not in fieldnames]
+    if missing:
+        raise ValueError(f"В файле нет колонок: {', '.join(missing)}")
+    return csv.DictReader(stream, fieldnames=fieldnames, dialect=dialect)
+
+
+def _parse_row(row, group_ids):
+    """
+    Проверяет строку файла и приводит ее к полям пользователя.
+    
+    Args:
+        row (dict): Строка файла
+        group_ids (dict): Название группы -> идентификатор
+    
+    Returns:
+        tuple: (поля строки или None, сообщение об ошибке или None)
+    """
+    username = (row.get("username") or "").strip()
+    password = row.get("password") or ""
+    group_name = (row.get("group") or "").strip()
+    first_name = (row.get("first_name") or "").strip()
+    last_name = (row.get("last_name") or "").strip()
+    if not first_name and not last_name and row.get("name"):
+        first_name, _, last_name = row["name"].strip().partition(" ")
+        last_name = last_name.strip()
+    
+    if not username:
+        return None, "не указан логин"
+    if len(username) > 50:
+        return None, "логин длиннее 50 символов"
+    if not password:
+        return None, "не указан пароль"
+    if len(first_name) > 50 or len(last_name) > 50:
+        return None, "имя или фамилия длиннее 50 символов"
+    if group_name not in group_ids:
+        return None, f"группа \"{group_name}\" не найдена"
+    return dict(
+        username=username,
+        password=password,
+        first_name=first_name or None,
+        last_name=last_name or None,
+        group_id=group_ids[group_name]
+    ), None
+
+
+def _insert_batch(batch):
+    """
+    Создает пользователей и студентов пакетом из нескольких запросов.
+    
+    Args:
+        batch (list): Поля строк с посчитанными хешами паролей
+    """
+    db.session.execute(insert(User), [
+        dict(
+            username=row["username"],
+            password=row["password"],
+            role="student",
+            first_name=row["first_name"],
+            last_name=row["last_name"]
+        )
+        for row in batch
+    ])
+    # RETURNING при пакетной вставке есть не во всех СУБД, поэтому
+    # идентификаторы читаются отдельным запросом
+    user_ids = dict(db.session.execute(
+        select(User.username, User.id).where(User.username.in_([row["username"] for row in batch]))
+    ).all())
+    db.session.execute(insert(Student), [
+        dict(user_id=user_ids[row["username"]], group_id=row["group_id"], is_group_admin=False)
+        for row in batch
+    ])
+
+
+def _import_batch(batch, errors):
+    """
+    Хеширует пароли и сохраняет пакет строк одной транзакцией.
+    
+    Если пакет нарушает ограничение уникальности (логин успели создать
+    параллельно), строки сохраняются по одной, чтобы ошибка относилась
+    только к конкретной строке.
+    
+    Args:
+        batch (list): Кортежи (номер строки, поля строки)
+        errors (list): Список ошибок (номер строки, логин, сообщение) для дополнения
+    
+    Returns:
+        int: Количество созданных студентов
+    """
+    rows = [fields for _, fields in batch]
+    try:
+        _insert_batch(rows)
+        for group_id in {row["group_id"] for row in rows}:
+            invalidate_report_cache(group_id)
+        db.session.commit()
+        return len(rows)
+    except IntegrityError:
+        db.session.rollback()
+    
+    created = 0
+    for line, fields in batch:
+        try:
+            _insert_batch([fields])
+            invalidate_report_cache(fields["group_id"])
+            db.session.commit()
+            created += 1
+        except IntegrityError:
+            db.session.rollback()
+            errors.append((line, fields["username"], "логин уже занят"))
+    return created
+
+
+def import_students(stream, batch_size=None, workers=None, progress=None):
+    """
+    Зачисляет студентов из CSV-файла.
+    
+    Файл читается потоком и обрабатывается пакетами: строки пакета
+    проверяются, пароли хешируются в пуле процессов, затем пользователи
+    и студенты вставляются пакетными запросами и фиксируются. Ошибочные
+    строки пропускаются и возвращаются вместе с номерами строк.
+    
+    Args:
+        stream: Текстовый поток с CSV (колонки username, group, password и
+            first_name/last_name или name)
+        batch_size (int, optional): Строк в пакете; по умолчанию IMPORT_BATCH_SIZE
+        workers (int, optional): Процессов хеширования; по умолчанию IMPORT_HASH_WORKERS
+        progress (function, optional): Функция progress(создано, обработано строк)
+    
+    Returns:
+        tuple: (количество созданных студентов, список ошибок (номер строки, логин, сообщение))
+    
+    Raises:
+        ValueError: Если в заголовке файла нет обязательных колонок
+    """
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+    workers = workers or current_app.config['IMPORT_HASH_WORKERS']
+    reader = _open_reader(stream)
+    group_ids = dict(db.session.execute(select(Group.name, Group.id)).all())
+    
+    created = 0
+    processed = 0
+    errors = []
+    seen = set()
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        def flush(pending):
+            """
+            Отбрасывает занятые логины, хеширует пароли и сохраняет пакет.
+            """
+            taken = set(db.session.scalars(
+                select(User.username).where(User.username.in_([fields["username"] for _, fields in pending]))
+            ))
+            batch = []
+            for line, fields in pending:
+                if fields["username"] in taken:
+                    errors.append((line, fields["username"], "логин уже занят"))
+                else:
+                    batch.append((line, fields))
+            if not batch:
+                return 0
+            hashes = hash_passwords([fields["password"] for _, fields in batch], executor)
+            for (_, fields), pwhash in zip(batch, hashes):
+                fields["password"] = pwhash
+            return _import_batch(batch, errors)
+        
+        pending = []
+        # Строка 1 - заголовок
+        for line, row in enumerate(reader, start=2):
+            processed += 1
+            fields, error = _parse_row(row, group_ids)
+            if error is None and fields["username"] in seen:
+                error = "логин повторяется в файле"
+            if error is not None:
+                errors.append((line, (row.get("username") or "").strip(), error))
+                continue
+            seen.add(fields["username"])
+            pending.append((line, fields))
+            
+            if len(pending) >= batch_size:
+                created += flush(pending)
+                pending = []
+                if progress:
+                    progress(created, processed)
+        
+        if pending:
+            created += flush(pending)
+            if progress:
+                progress(created, processed)
+    
+    errors.sort()
+    return created, errors
+
+
+def transfer_students(student_ids, group_id, group_admin_id=None, clear_admins=False):
+    """
+    Переводит студентов в другую группу одним запросом UPDATE.
+    
+    Если указан новый староста, в той же инструкции признак старосты
+    выставляется ему и снимается с остальных студентов группы назначения
+    (и уже состоявших в ней, и переведенных). Кэши принадлежности к
+    группам, прав старост и отчетов сбрасываются после фиксации.
+    
+    Args:
+        student_ids (iterable): Идентификаторы переводимых студентов
+        group_id (int): Идентификатор группы назначения
+        group_admin_id (int, optional): Студент, который становится старостой группы назначения
+        clear_admins (bool): Снять признак старосты с переводимых студентов
+    
+    Returns:
+        int: Количество переведенных студентов
+    
+    Raises:
+        ValueError: Если староста не входит в группу назначения после перевода
+    """
+    student_ids = list(student_ids)
+    if not student_ids:
+        return 0
+    
+    moved = Student.id.in_(student_ids)
+    if group_admin_id is not None:
+        affected = or_(moved, Student.group_id == group_id)
+        values = dict(group_id=group_id, is_group_admin=(Student.id == group_admin_id))
+    elif clear_admins:
+        affected = moved
+        values = dict(group_id=group_id, is_group_admin=False)
+    else:
+        affected = moved
+        values = dict(group_id=group_id)
+    
+    rows = db.session.execute(select(Student.id, Student.user_id, Student.group_id).where(affected)).all()
+    if group_admin_id is not None and group_admin_id not in {row.id for row in rows}:
+        raise ValueError("Староста должен состоять в группе назначения")
+    
+    db.session.execute(
+        update(Student).where(affected).values(**values),
+        execution_options={"synchronize_session": False}
+    )
+    
+    for row in rows:
+        invalidate_group_admin(row.user_id)
+    for old_group_id in {row.group_id for row in rows} | {group_id}:
+        invalidate_report_cache(old_group_id)
+    db.session.commit()
+    
+    # При смене старосты затронуты и студенты, уже состоявшие в группе назначения
+    requested = set(student_ids)
+    return sum(1 for row in rows if row.id in requested)
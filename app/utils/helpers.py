@@ -66,4 +66,38 @@ def parse_date(date_str, format_str="%Y-%m-%d"):
     try:
         return datetime.strptime(date_str, format_str).date()
     except (ValueError, TypeError):
-        return None 
\ No newline at end of file
+        return None 
+
+def encode_cursor(date_obj, lesson_id, record_id):
+    """
+    Кодирует позицию записи журнала в курсор для постраничной навигации.
+    
+    Args:
+        date_obj (datetime.date): Дата записи
+        lesson_id (int): Идентификатор занятия
+        record_id (int): Идентификатор записи
+        
+    Returns:
+        str: Курсор вида YYYY-MM-DD_<lesson_id>_<id>
+    """
+    return f"{date_obj.strftime('%Y-%m-%d')}_{lesson_id}_{record_id}"
+
+
+def decode_cursor(cursor):
+    """
+    Декодирует курсор постраничной навигации.
+    
+    Args:
+        cursor (str): Курсор, полученный из encode_cursor
+        
+    Returns:
+        tuple: (date, lesson_id, id) или None, если курсор пуст или некорректен
+    """
+    try:
+        date_str, lesson_id, record_id = cursor.split("_")
+        date_obj = parse_date(date_str)
+        if date_obj is None:
+            return None
+        return date_obj, int(lesson_id), int(record_id)
+    except (ValueError, AttributeError):
+        return None
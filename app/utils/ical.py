@@ -0,0 +1,120 @@
+"""
+Формирование календаря в формате iCalendar (RFC 5545).
+"""
+from datetime import datetime, time, timezone
+from zoneinfo import ZoneInfo
+
+# Максимальная длина строки календаря в октетах
+LINE_LIMIT = 75
+
+
+def escape_text(value):
+    """
+    Экранирует текстовое значение свойства календаря.
+    
+    Args:
+        value (str): Исходный текст
+    
+    Returns:
+        str: Экранированный текст
+    """
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold_line(line):
+    """
+    Переносит строку длиннее 75 октетов, не разрывая символы UTF-8.
+    
+    Args:
+        line (str): Строка свойства
+    
+    Returns:
+        str: Строка с переносами CRLF + пробел
+    """
+    parts = []
+    current, size = [], 0
+    for char in line:
+        char_size = len(char.encode("utf-8"))
+        # Продолжение начинается с пробела, который тоже занимает октет
+        limit = LINE_LIMIT if not parts else LINE_LIMIT - 1
+        if size + char_size > limit:
+            parts.append("".join(current))
+            current, size = [], 0
+        current.append(char)
+        size += char_size
+    parts.append("".join(current))
+    return "\r\n ".join(parts)
+
+
+def format_utc(value):
+    """
+    Форматирует момент времени в UTC.
+    
+    Args:
+        value (datetime): Время с часовым поясом или наивное время в UTC
+    
+    Returns:
+        str: Время в формате ГГГГММДДTЧЧММССZ
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_calendar(name, events, tz_name, lesson_times, stamp):
+    """
+    Формирует календарь занятий.
+    
+    Время занятий задается номером пары и переводится в UTC, поэтому
+    описание часового пояса (VTIMEZONE) в календарь не включается.
+    
+    Args:
+        name (str): Название календаря
+        events (iterable): Занятия с полями lesson_id, date, lesson_number,
+            subject_name, lesson_type, group_name
+        tz_name (str): Часовой пояс расписания (например, 'Europe/Moscow')
+        lesson_times (dict): Номер пары -> ("ЧЧ:ММ" начала, "ЧЧ:ММ" конца)
+        stamp (datetime): Время изменения расписания (UTC) для DTSTAMP
+    
+    Returns:
+        str: Текст календаря
+    """
+    zone = ZoneInfo(tz_name)
+    times = {
+        number: (time.fromisoformat(start), time.fromisoformat(end))
+        for number, (start, end) in lesson_times.items()
+    }
+    dtstamp = format_utc(stamp)
+    
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//University Portal//Timetable//RU",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(name)}",
+        f"X-WR-TIMEZONE:{tz_name}",
+    ]
+    for event in events:
+        if event.lesson_number not in times:
+            continue
+        start, end = times[event.lesson_number]
+        lines.extend([
+            "BEGIN:VEVENT",
+            f"UID:{event.lesson_id}-{event.date:%Y%m%d}@university-portal",
+            f"DTSTAMP:{dtstamp}",
+            f"DTSTART:{format_utc(datetime.combine(event.date, start, zone))}",
+            f"DTEND:{format_utc(datetime.combine(event.date, end, zone))}",
+            f"SUMMARY:{escape_text(f'{event.subject_name} ({event.lesson_type})')}",
+            f"DESCRIPTION:{escape_text(f'Группа {event.group_name}, {event.lesson_number} пара')}",
+            "END:VEVENT",
+        ])
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(fold_line(line) for line in lines) + "\r\n"
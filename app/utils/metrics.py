@@ -0,0 +1,31 @@
+"""
+Счетчики метрик приложения (в пределах процесса).
+"""
+import threading
+from collections import Counter
+
+_lock = threading.Lock()
+_counters = Counter()
+
+
+def increment(name, value=1):
+    """
+    Увеличивает счетчик метрики.
+    
+    Args:
+        name (str): Имя метрики
+        value (int): Величина приращения
+    """
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot():
+    """
+    Возвращает текущие значения всех счетчиков.
+    
+    Returns:
+        dict: Имя метрики -> значение
+    """
+    with _lock:
+        return dict(_counters)
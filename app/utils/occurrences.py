@@ -0,0 +1,91 @@
+"""
+Генерация дат проведения занятий (таблица lesson_occurrences).
+"""
+from datetime import timedelta
+from sqlalchemy import select, insert, delete
+from app import db
+from app.models.lesson import Lesson
+from app.models.lesson_occurrence import LessonOccurrence
+from app.models.semester import Semester
+
+# Размер порции вставки дат занятий
+INSERT_CHUNK_SIZE = 1000
+
+
+def _lesson_dates(lesson, semester):
+    """
+    Перечисляет даты, в которые занятие проводится в семестре.
+    
+    Args:
+        lesson: Занятие (day_of_week, week_type)
+        semester (Semester): Семестр
+    
+    Yields:
+        datetime.date: Дата проведения
+    """
+    if lesson.day_of_week not in Lesson.DAYS_OF_WEEK:
+        return
+    weekday = Lesson.DAYS_OF_WEEK.index(lesson.day_of_week)
+    date = semester.start_date + timedelta(days=(weekday - semester.start_date.weekday()) % 7)
+    while date <= semester.end_date:
+        if lesson.week_type == "Обе" or semester.week_type(date) == lesson.week_type:
+            yield date
+        date += timedelta(days=7)
+
+
+def regenerate_occurrences(lesson_ids=None, semester_id=None):
+    """
+    Пересчитывает даты проведения занятий по расписанию и семестрам.
+    
+    Удаляет даты, подходящие под фильтры, и заново разворачивает
+    недельное расписание в даты. Вызывается в той же транзакции, что и
+    изменение занятий или семестров; без фильтров пересобирает таблицу
+    целиком.
+    
+    Args:
+        lesson_ids (iterable, optional): Идентификаторы занятий
+        semester_id (int, optional): Идентификатор семестра
+    
+    Returns:
+        int: Количество созданных дат
+    """
+    target = []
+    lessons = select(Lesson.id, Lesson.group_id, Lesson.day_of_week, Lesson.week_type, Lesson.lesson_number)
+    semesters = Semester.query
+    
+    if lesson_ids is not None:
+        lesson_ids = list(lesson_ids)
+        target.append(LessonOccurrence.lesson_id.in_(lesson_ids))
+        lessons = lessons.where(Lesson.id.in_(lesson_ids))
+    if semester_id is not None:
+        target.append(LessonOccurrence.semester_id == semester_id)
+        semesters = semesters.filter(Semester.id == semester_id)
+    
+    db.session.flush()
+    db.session.execute(
+        delete(LessonOccurrence).where(*target),
+        execution_options={"synchronize_session": False}
+    )
+    
+    semesters = semesters.all()
+    rows = []
+    created = 0
+    for lesson in db.session.execute(lessons).all():
+        for semester in semesters:
+            for date in _lesson_dates(lesson, semester):
+                rows.append(dict(
+                    lesson_id=lesson.id,
+                    date=date,
+                    group_id=lesson.group_id,
+                    semester_id=semester.id,
+                    lesson_number=lesson.lesson_number
+                ))
+        if len(rows) >= INSERT_CHUNK_SIZE:
+            db.session.execute(insert(LessonOccurrence), rows)
+            created += len(rows)
+            rows = []
+    
+    if rows:
+        db.session.execute(insert(LessonOccurrence), rows)
+        created += len(rows)
+    return created
@@ -0,0 +1,151 @@
+"""
+Политика хеширования паролей.
+"""
+import functools
+import threading
+from itertools import repeat
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils import metrics
+
+
+class PasswordHashingBusy(Exception):
+    """
+    Все слоты хеширования паролей в процессе заняты дольше допустимого.
+    """
+
+
+# Ограничение одновременных вычислений хеша в процессе, чтобы волна
+# входов не занимала все потоки воркера
+_hash_slots = threading.BoundedSemaphore(2)
+_hash_timeout = 5
+
+
+def configure(concurrency, timeout):
+    """
+    Задает ограничение одновременных вычислений хеша.
+    
+    Args:
+        concurrency (int): Количество одновременных вычислений в процессе
+        timeout (float): Время ожидания свободного слота в секундах
+    """
+    global _hash_slots, _hash_timeout
+    _hash_slots = threading.BoundedSemaphore(concurrency)
+    _hash_timeout = timeout
+
+
+def _with_slot(func, *args):
+    """
+    Выполняет вычисление хеша, дождавшись свободного слота.
+    
+    Args:
+        func (function): Функция хеширования
+        *args: Аргументы функции
+    
+    Returns:
+        Результат функции
+    
+    Raises:
+        PasswordHashingBusy: Если слот не освободился за отведенное время
+    """
+    slots = _hash_slots
+    if not slots.acquire(timeout=_hash_timeout):
+        metrics.increment("password_hash.busy")
+        raise PasswordHashingBusy()
+    try:
+        metrics.increment("password_hash.computed")
+        return func(*args)
+    finally:
+        slots.release()
+
+
+@functools.lru_cache(maxsize=None)
+def _method_prefix(method):
+    """
+    Возвращает префикс хеша, который werkzeug записывает для метода.
+    
+    Для методов без явных параметров (например, "scrypt") werkzeug
+    подставляет значения по умолчанию, поэтому префикс вычисляется
+    один раз пробным хешированием.
+    
+    Args:
+        method (str): Метод хеширования из конфигурации
+    
+    Returns:
+        str: Префикс хеша до первого символа $
+    """
+    return generate_password_hash("", method=method, salt_length=1).split("$", 1)[0]
+
+
+def hash_password(password):
+    """
+    Хеширует пароль по политике из конфигурации.
+    
+    Args:
+        password (str): Пароль
+    
+    Returns:
+        str: Хеш пароля
+    """
+    return _with_slot(
+        generate_password_hash,
+        password,
+        current_app.config['PASSWORD_HASH_METHOD'],
+        current_app.config['PASSWORD_SALT_LENGTH']
+    )
+
+
+def hash_passwords(passwords, executor):
+    """
+    Хеширует пакет паролей по политике из конфигурации в пуле процессов.
+    
+    Используется массовым импортом: вычисление хеша занимает процессор,
+    поэтому пакет распределяется по процессам пула, а не выполняется в
+    слотах текущего процесса.
+    
+    Args:
+        passwords (list): Пароли
+        executor (concurrent.futures.ProcessPoolExecutor): Пул процессов
+    
+    Returns:
+        list: Хеши в порядке паролей
+    """
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    salt_length = current_app.config['PASSWORD_SALT_LENGTH']
+    metrics.increment("password_hash.computed", len(passwords))
+    # Пароли передаются процессам порциями, чтобы не платить за пересылку каждого
+    return list(executor.map(generate_password_hash, passwords, repeat(method), repeat(salt_length), chunksize=16))
+
+
+def verify_password(pwhash, password):
+    """
+    Проверяет пароль по сохраненному хешу.
+    
+    Args:
+        pwhash (str): Сохраненный хеш
+        password (str): Пароль для проверки
+    
+    Returns:
+        bool: True если пароль верный, иначе False
+    """
+    return _with_slot(check_password_hash, pwhash, password)
+
+
+def needs_rehash(pwhash):
+    """
+    Проверяет, посчитан ли хеш по устаревшей политике.
+    
+    Args:
+        pwhash (str): Сохраненный хеш
+    
+    Returns:
+        bool: True если хеш нужно пересчитать
+    """
+    try:
+        method, salt, _ = pwhash.split("$", 2)
+    except ValueError:
+        return True
+    return (
+        method != _method_prefix(current_app.config['PASSWORD_HASH_METHOD'])
+        or len(salt) != current_app.config['PASSWORD_SALT_LENGTH']
+    )
@@ -0,0 +1,56 @@
+"""
+Подсчет SQL-запросов, выполняемых приложением.
+"""
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import db
+
+
+class QueryCounter:
+    """
+    Счетчик SQL-запросов, подключаемый к движку SQLAlchemy.
+    
+    Attributes:
+        count (int): Количество выполненных запросов
+        statements (list): Тексты выполненных запросов
+        parameters (list): Параметры выполненных запросов
+    """
+    
+    def __init__(self):
+        """
+        Инициализация счетчика.
+        """
+        self.count = 0
+        self.statements = []
+        self.parameters = []
+    
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        """
+        Обработчик события before_cursor_execute.
+        """
+        self.count += 1
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+
+
+@contextmanager
+def count_queries(engine=None):
+    """
+    Контекстный менеджер для подсчета запросов внутри блока.
+    
+    Используется для проверки, что количество запросов эндпоинта
+    не зависит от объема отображаемых данных. Требует контекста приложения.
+    
+    Args:
+        engine: Движок SQLAlchemy (по умолчанию db.engine)
+        
+    Yields:
+        QueryCounter: Счетчик запросов
+    """
+    engine = engine or db.engine
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
@@ -0,0 +1,378 @@
+"""
+Ограничение частоты запросов к маршрутам (алгоритм token bucket).
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request, session
+from app.utils import metrics
+
+# Длительность периодов в лимитах вида "10/minute"
+PERIODS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400
+}
+
+# Маршруты входа: показ формы не расходует лимит, а неудачные попытки
+# дополнительно считаются по паре адрес + логин (см. login_retry_after)
+LOGIN_ENDPOINTS = {"auth.login"}
+
+
+def parse_limit(limit):
+    """
+    Разбирает лимит вида "10/minute".
+    
+    Args:
+        limit (str): Количество запросов и период через косую черту
+    
+    Returns:
+        tuple: (емкость корзины, скорость пополнения в токенах в секунду)
+    
+    Raises:
+        ValueError: Если лимит записан неверно
+    """
+    count, _, period = limit.partition("/")
+    if period not in PERIODS:
+        raise ValueError(f"Неизвестный период в лимите: {limit}")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period]
+
+
+def _take_token(tokens, updated, capacity, rate, now):
+    """
+    Пополняет корзину за прошедшее время и пытается взять из нее токен.
+    
+    Args:
+        tokens (float): Токенов в корзине на момент updated
+        updated (float): Время последнего обновления корзины
+        capacity (int): Емкость корзины
+        rate (float): Скорость пополнения в токенах в секунду
+        now (float): Текущее время
+    
+    Returns:
+        tuple: (разрешено ли, токенов после запроса, секунд до следующего токена)
+    """
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return True, tokens - 1, 0
+    return False, tokens, (1 - tokens) / rate
+
+
+class MemoryBackend:
+    """
+    Хранение корзин в памяти процесса.
+    
+    Каждый процесс gunicorn считает запросы независимо, поэтому
+    фактический лимит на весь сервер равен лимиту, умноженному на число
+    воркеров.
+    """
+    
+    def __init__(self, max_keys=100000):
+        """
+        Инициализация хранилища.
+        
+        Args:
+            max_keys (int): Максимальное количество корзин; самые давние вытесняются
+        """
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def consume(self, key, capacity, rate):
+        """
+        Берет токен из корзины ключа.
+        
+        Args:
+            key (str): Ключ корзины
+            capacity (int): Емкость корзины
+            rate (float): Скорость пополнения в токенах в секунду
+        
+        Returns:
+            tuple: (разрешено ли, секунд до следующего токена)
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            allowed, tokens, retry_after = _take_token(tokens, updated, capacity, rate, now)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+    
+    def peek(self, key, capacity, rate):
+        """
+        Проверяет, есть ли в корзине ключа токен, не забирая его.
+        
+        Args:
+            key (str): Ключ корзины
+            capacity (int): Емкость корзины
+            rate (float): Скорость пополнения в токенах в секунду
+        
+        Returns:
+            tuple: (разрешено ли, секунд до следующего токена)
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+        allowed, _, retry_after = _take_token(tokens, updated, capacity, rate, now)
+        return allowed, retry_after
+
+
+class SQLiteBackend:
+    """
+    Хранение корзин в отдельном файле SQLite, общем для всех процессов сервера.
+    
+    Не использует базу приложения: отказ обходится без обращения к ней.
+    Корзина, которая простаивает дольше времени полного пополнения
+    (емкость / скорость), не отличается от отсутствующей, поэтому такие
+    строки периодически удаляются при записи.
+    """
+    
+    def __init__(self, path, sweep_interval=60):
+        """
+        Инициализация хранилища.
+        
+        Args:
+            path (str): Путь к файлу базы лимитов
+            sweep_interval (int): Интервал удаления простаивающих корзин в секундах
+        """
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._swept = time.time()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(buckets)")}
+            if columns and "expires" not in columns:
+                # Файл прежнего формата: корзины временные, их можно не переносить
+                connection.execute("DROP TABLE buckets")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, expires REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_buckets_expires ON buckets (expires)")
+    
+    def _connect(self):
+        """
+        Возвращает соединение текущего потока.
+        
+        Returns:
+            sqlite3.Connection: Соединение с файлом лимитов
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+    
+    def consume(self, key, capacity, rate):
+        """
+        Берет токен из корзины ключа.
+        
+        Args:
+            key (str): Ключ корзины
+            capacity (int): Емкость корзины
+            rate (float): Скорость пополнения в токенах в секунду
+        
+        Returns:
+            tuple: (разрешено ли, секунд до следующего токена)
+        """
+        # Время стены, так как корзины разделяются между процессами
+        now = time.time()
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            allowed, tokens, retry_after = _take_token(tokens, updated, capacity, rate, now)
+            connection.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated, expires) VALUES (?, ?, ?, ?)",
+                (key, tokens, now, now + capacity / rate)
+            )
+            if now - self._swept >= self.sweep_interval:
+                self._swept = now
+                connection.execute("DELETE FROM buckets WHERE expires < ?", (now,))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return allowed, retry_after
+    
+    def peek(self, key, capacity, rate):
+        """
+        Проверяет, есть ли в корзине ключа токен, не забирая его.
+        
+        Args:
+            key (str): Ключ корзины
+            capacity (int): Емкость корзины
+            rate (float): Скорость пополнения в токенах в секунду
+        
+        Returns:
+            tuple: (разрешено ли, секунд до следующего токена)
+        """
+        now = time.time()
+        row = self._connect().execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+        tokens, updated = row if row else (capacity, now)
+        allowed, _, retry_after = _take_token(tokens, updated, capacity, rate, now)
+        return allowed, retry_after
+
+
+def create_backend(url):
+    """
+    Создает хранилище корзин по адресу из конфигурации.
+    
+    Args:
+        url (str): "memory" или "sqlite:///путь/к/файлу.db"
+    
+    Returns:
+        Хранилище с методами consume(key, capacity, rate) и peek(key, capacity, rate)
+    
+    Raises:
+        ValueError: Если тип хранилища неизвестен
+    """
+    if url == "memory":
+        return MemoryBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    raise ValueError(f"Неизвестное хранилище лимитов: {url}")
+
+
+def _client_address(ip_header):
+    """
+    Возвращает адрес клиента.
+    
+    Args:
+        ip_header (str): Заголовок с адресом от обратного прокси или None
+    
+    Returns:
+        str: IP-адрес клиента
+    """
+    address = request.headers.get(ip_header) if ip_header else None
+    return address or request.remote_addr
+
+
+def too_many_requests(retry_after):
+    """
+    Ответ на запрос сверх лимита с учетом в метриках.
+    
+    Args:
+        retry_after (float): Секунд до следующего токена
+    
+    Returns:
+        tuple: Ответ 429 с заголовком Retry-After
+    """
+    metrics.increment("rate_limit.rejected")
+    metrics.increment(f"rate_limit.rejected.{request.endpoint}")
+    return (
+        "Слишком много запросов, повторите позже",
+        429,
+        {"Retry-After": str(max(1, int(retry_after + 0.999))), "Content-Type": "text/plain; charset=utf-8"}
+    )
+
+
+def _login_bucket(username):
+    """
+    Корзина неудачных входов под логином с адреса клиента.
+    
+    Ключ включает адрес, чтобы чужие попытки с других адресов не
+    блокировали вход владельцу учетной записи.
+    
+    Args:
+        username (str): Введенный логин
+    
+    Returns:
+        tuple: (хранилище, ключ, лимит) или None, если лимит для маршрута не задан
+    """
+    state = current_app.extensions.get("rate_limit")
+    limit = state["limits"].get(request.endpoint) if state else None
+    if limit is None:
+        return None
+    address = _client_address(current_app.config['RATE_LIMIT_IP_HEADER'])
+    return state["backend"], f"{request.endpoint}:login:{address}:{username}", limit
+
+
+def login_retry_after(username):
+    """
+    Проверяет до поиска пользователя и проверки пароля, не исчерпан ли
+    лимит неудачных входов под логином с адреса клиента.
+    
+    Args:
+        username (str): Введенный логин
+    
+    Returns:
+        float: Секунд до следующей попытки; 0 - вход разрешен
+    """
+    bucket = _login_bucket(username)
+    if bucket is None:
+        return 0
+    backend, key, limit = bucket
+    allowed, retry_after = backend.peek(key, *limit)
+    return 0 if allowed else retry_after
+
+
+def login_failed(username):
+    """
+    Учитывает неудачный вход под логином с адреса клиента. Успешные
+    входы лимит не расходуют.
+    
+    Args:
+        username (str): Введенный логин
+    """
+    bucket = _login_bucket(username)
+    if bucket is not None:
+        backend, key, limit = bucket
+        backend.consume(key, *limit)
+
+
+def init_app(app):
+    """
+    Подключает ограничение частоты запросов к приложению.
+    
+    Лимиты задаются в RATE_LIMITS по имени маршрута (endpoint) и
+    считаются отдельно для каждого пользователя, а для анонимных
+    запросов - для каждого IP-адреса. Для маршрутов из LOGIN_ENDPOINTS
+    учитываются только отправки формы. Отклоненный запрос получает
+    ответ 429 до обращения к базе данных.
+    
+    Args:
+        app (flask.Flask): Приложение
+    """
+    if not app.config['RATE_LIMIT_ENABLED']:
+        return
+    
+    limits = {endpoint: parse_limit(limit) for endpoint, limit in app.config['RATE_LIMITS'].items()}
+    backend = create_backend(app.config['RATE_LIMIT_BACKEND'])
+    ip_header = app.config['RATE_LIMIT_IP_HEADER']
+    app.extensions["rate_limit"] = {"backend": backend, "limits": limits}
+    
+    @app.before_request
+    def check_rate_limit():
+        """
+        Отклоняет запрос, если для его маршрута исчерпан лимит.
+        """
+        limit = limits.get(request.endpoint)
+        if limit is None:
+            return None
+        
+        if request.endpoint in LOGIN_ENDPOINTS and request.method != "POST":
+            # Показ формы входа не расходует лимит
+            return None
+        
+        user_id = session.get('user_id')
+        if user_id is not None:
+            client = f"user:{user_id}"
+        else:
+            client = f"ip:{_client_address(ip_header)}"
+        
+        allowed, retry_after = backend.consume(f"{request.endpoint}:{client}", *limit)
+        if allowed:
+            return None
+        return too_many_requests(retry_after)
@@ -0,0 +1,128 @@
+"""
+Поддержка дневной сводки посещаемости (таблица attendance_daily).
+"""
+from sqlalchemy import select, insert, delete, func, case
+from app import db
+from app.utils.at_risk import enqueue_at_risk
+from app.utils.cache import invalidate_report_cache
+from app.models.attendance import Attendance
+from app.models.attendance_daily import AttendanceDaily
+from app.models.lesson import Lesson
+from app.models.student import Student
+
+
+def _count_status(status):
+    """
+    Выражение для подсчета записей с заданным статусом.
+    
+    Args:
+        status (str): Статус посещения
+        
+    Returns:
+        Выражение SQLAlchemy
+    """
+    return func.sum(case((Attendance.status == status, 1), else_=0))
+
+
+def refresh_rollup(date=None, student_ids=None, subject_id=None, group_id=None):
+    """
+    Пересчитывает строки сводки, затронутые изменением посещаемости.
+    
+    Удаляет строки сводки, подходящие под фильтры, и заново агрегирует
+    для них исходные записи attendance, поэтому работа пропорциональна
+    объему изменения, а не всей таблице. Вызывается после изменения
+    исходных записей в той же транзакции; без фильтров пересобирает
+    сводку целиком.
+    
+    Args:
+        date (datetime.date, optional): Дата занятий
+        student_ids (iterable, optional): Идентификаторы студентов
+        subject_id (int, optional): Идентификатор предмета
+        group_id (int, optional): Идентификатор группы студентов
+    """
+    target = []
+    source = []
+    
+    if date is not None:
+        target.append(AttendanceDaily.date == date)
+        source.append(Attendance.date == date)
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        target.append(AttendanceDaily.student_id.in_(student_ids))
+        source.append(Attendance.student_id.in_(student_ids))
+    if subject_id is not None:
+        target.append(AttendanceDaily.subject_id == subject_id)
+        source.append(Lesson.subject_id == subject_id)
+    if group_id is not None:
+        group_students = select(Student.id).where(Student.group_id == group_id)
+        target.append(AttendanceDaily.student_id.in_(group_students))
+        source.append(Attendance.student_id.in_(group_students))
+    
+    db.session.flush()
+    
+    # Сбрасываем кэш отчетов для затронутых групп
+    if group_id is not None:
+        invalidate_report_cache(group_id)
+    elif student_ids is not None:
+        for student_group_id in db.session.scalars(
+            select(Student.group_id).where(Student.id.in_(student_ids)).distinct()
+        ):
+            invalidate_report_cache(student_group_id)
+    else:
+        invalidate_report_cache()
+    
+    # Ставим затронутых студентов в очередь пересчета группы риска;
+    # при фильтре только по дате или предмету берем студентов из сводки
+    # до и после пересчета
+    if student_ids is not None:
+        enqueue_at_risk(student_ids)
+    elif group_id is not None:
+        enqueue_at_risk(select(Student.id).where(Student.group_id == group_id))
+    elif not target:
+        enqueue_at_risk(select(Student.id))
+    else:
+        enqueue_at_risk(select(AttendanceDaily.student_id).where(*target).distinct())
+    
+    db.session.execute(
+        delete(AttendanceDaily).where(*target),
+        execution_options={"synchronize_session": False}
+    )
+    
+    aggregated = select(
+        Attendance.student_id,
+        Attendance.date,
+        Lesson.subject_id,
+        func.count(Attendance.id),
+        _count_status(Attendance.STATUS_PRESENT),
+        _count_status(Attendance.STATUS_ABSENT),
+        _count_status(Attendance.STATUS_LATE),
+        _count_status(Attendance.STATUS_SICK)
+    ).join(
+        Lesson, Attendance.lesson_id == Lesson.id
+    ).where(
+        *source
+    ).group_by(
+        Attendance.student_id, Attendance.date, Lesson.subject_id
+    )
+    
+    db.session.execute(
+        insert(AttendanceDaily).from_select(
+            ["student_id", "date", "subject_id", "total", "present", "absent", "late", "sick"],
+            aggregated
+        )
+    )
+    
+    if student_ids is None and group_id is None and target:
+        enqueue_at_risk(select(AttendanceDaily.student_id).where(*target).distinct())
+
+
+def rebuild_rollup():
+    """
+    Полностью пересобирает сводку по всем записям посещаемости.
+    
+    Returns:
+        int: Количество строк в сводке
+    """
+    refresh_rollup()
+    db.session.commit()
+    return db.session.query(func.count()).select_from(AttendanceDaily).scalar()
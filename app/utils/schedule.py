@@ -0,0 +1,59 @@
+"""
+Версии расписания групп для календарных лент и кэшей.
+"""
+from datetime import datetime
+from sqlalchemy import select, insert, update, literal
+from app import db
+from app.models.group import Group
+from app.models.schedule_version import ScheduleVersion
+from app.utils.cache import invalidate_timetable
+
+
+def schedule_changed(group_id=None):
+    """
+    Отмечает изменение расписания группы.
+    
+    Увеличивает версию расписания в текущей транзакции и сбрасывает кэш
+    расписания после ее фиксации. Вызывается вместо invalidate_timetable
+    везде, где меняются занятия, их даты, предметы или группы.
+    
+    Args:
+        group_id (int, optional): Идентификатор группы; None - все группы
+    """
+    invalidate_timetable(group_id)
+    now = datetime.utcnow()
+    
+    bump = update(ScheduleVersion).values(version=ScheduleVersion.version + 1, updated_at=now)
+    if group_id is not None:
+        result = db.session.execute(
+            bump.where(ScheduleVersion.group_id == group_id),
+            execution_options={"synchronize_session": False}
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(ScheduleVersion).values(group_id=group_id, version=1, updated_at=now))
+        return
+    
+    db.session.execute(bump, execution_options={"synchronize_session": False})
+    missing = select(Group.id, literal(1), literal(now, db.DateTime)).where(
+        ~select(ScheduleVersion.group_id).where(ScheduleVersion.group_id == Group.id).exists()
+    )
+    db.session.execute(
+        insert(ScheduleVersion).from_select(["group_id", "version", "updated_at"], missing)
+    )
+
+
+def schedule_version(group_id):
+    """
+    Возвращает текущую версию расписания группы.
+    
+    Args:
+        group_id (int): Идентификатор группы
+    
+    Returns:
+        tuple: (номер версии, время изменения или None); для группы, расписание
+        которой не менялось, - (0, None)
+    """
+    row = db.session.execute(
+        select(ScheduleVersion.version, ScheduleVersion.updated_at).where(ScheduleVersion.group_id == group_id)
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
@@ -0,0 +1,179 @@
+"""
+Индексированный поиск пользователей по логину, имени и фамилии.
+
+В SQLite используется таблица полнотекстового поиска FTS5 с токенизатором
+trigram (требуется SQLite 3.34+), в PostgreSQL - GIN-индекс pg_trgm.
+Индекс обновляется самой базой (триггеры FTS5 или обычный индекс),
+поэтому остается согласованным при любом способе изменения пользователей.
+В остальных СУБД и для запросов короче трех символов поиск выполняется
+через LIKE с ограничением размера страницы.
+"""
+from sqlalchemy import DDL, event, func, literal_column, text, select, table, column
+from app import db
+from app.models.user import User
+
+# Минимальная длина запроса, для которой работает триграммный индекс
+MIN_INDEXED_LENGTH = 3
+
+# Объекты индекса не входят в метаданные моделей и исключены из
+# автогенерации миграций (см. migrations/env.py)
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5("
+    "username, first_name, last_name, content='users', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN "
+    "INSERT INTO users_fts(rowid, username, first_name, last_name) "
+    "VALUES (new.id, new.username, new.first_name, new.last_name); END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, username, first_name, last_name) "
+    "VALUES ('delete', old.id, old.username, old.first_name, old.last_name); END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF username, first_name, last_name ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, username, first_name, last_name) "
+    "VALUES ('delete', old.id, old.username, old.first_name, old.last_name); "
+    "INSERT INTO users_fts(rowid, username, first_name, last_name) "
+    "VALUES (new.id, new.username, new.first_name, new.last_name); END",
+]
+
+# Заполнение FTS5 по уже существующим пользователям (далее индекс
+# поддерживают триггеры)
+SQLITE_REBUILD = "INSERT INTO users_fts(users_fts) VALUES ('rebuild')"
+
+POSTGRESQL_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_users_search_trgm ON users USING gin "
+    "((coalesce(username, '') || ' ' || coalesce(first_name, '') || ' ' || coalesce(last_name, '')) gin_trgm_ops)",
+]
+
+
+
+def _create_sqlite_index(target, connection, **kw):
+    """
+    Создает таблицу FTS5 и триггеры после db.create_all().
+    
+    Полное перестроение индекса выполняется только при создании таблицы:
+    create_all вызывается при каждом запуске run.py и в скриптах
+    заполнения, а существующую таблицу уже поддерживают триггеры.
+    
+    Args:
+        target (MetaData): Метаданные моделей
+        connection (Connection): Соединение, в котором создаются таблицы
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users_fts'")
+    ).first()
+    for statement in SQLITE_DDL:
+        connection.exec_driver_sql(statement)
+    if exists is None:
+        connection.exec_driver_sql(SQLITE_REBUILD)
+
+
+# Индекс создается и при db.create_all() (тесты, scripts/reset_db.py)
+event.listen(db.metadata, "after_create", _create_sqlite_index)
+for _statement in POSTGRESQL_DDL:
+    event.listen(db.metadata, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+event.listen(db.metadata, "before_drop", DDL("DROP TABLE IF EXISTS users_fts").execute_if(dialect="sqlite"))
+
+
+def _search_document():
+    """
+    Выражение с логином, именем и фамилией, совпадающее с выражением
+    GIN-индекса PostgreSQL.
+    
+    Returns:
+        Выражение SQLAlchemy
+    """
+    space = literal_column("' '", db.String)
+    empty = literal_column("''", db.String)
+    return (
+        func.coalesce(User.username, empty) + space
+        + func.coalesce(User.first_name, empty) + space
+        + func.coalesce(User.last_name, empty)
+    )
+
+
+def _fts_phrase(term):
+    """
+    Записывает запрос как фразу FTS5, чтобы символы синтаксиса
+    (кавычки, звездочки, операторы) искались буквально.
+    
+    Args:
+        term (str): Строка поиска
+    
+    Returns:
+        str: Фраза в двойных кавычках
+    """
+    return '"' + term.replace('"', '""') + '"'
+
+
+def search_condition(term):
+    """
+    Условие отбора пользователей по подстроке для использования в других
+    запросах (например, вместе с фильтром по роли).
+    
+    Args:
+        term (str): Непустая строка поиска
+    
+    Returns:
+        Выражение SQLAlchemy для filter()
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite" and len(term) >= MIN_INDEXED_LENGTH:
+        matches = select(column("rowid")).select_from(table("users_fts")).where(
+            text("users_fts MATCH :phrase").bindparams(phrase=_fts_phrase(term))
+        )
+        return User.id.in_(matches)
+    if dialect == "postgresql" and len(term) >= MIN_INDEXED_LENGTH:
+        # ILIKE по выражению индекса использует GIN-индекс pg_trgm
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return _search_document().ilike(f"%{escaped}%", escape="\\")
+    return db.or_(
+        User.username.contains(term, autoescape=True),
+        User.first_name.contains(term, autoescape=True),
+        User.last_name.contains(term, autoescape=True)
+    )
+
+
+def search_users(term, page=1, per_page=50):
+    """
+    Ищет пользователей по подстроке логина, имени или фамилии.
+    
+    Результаты упорядочены по релевантности (совпадение в логине важнее),
+    без запроса - по логину. Загружается не больше одной страницы и одной
+    лишней записи, по которой определяется наличие следующей страницы.
+    
+    Args:
+        term (str): Строка поиска; пустая - все пользователи
+        page (int): Номер страницы, начиная с 1
+        per_page (int): Количество пользователей на странице
+    
+    Returns:
+        tuple: (пользователи страницы, есть ли следующая страница)
+    """
+    term = (term or "").strip()
+    offset = (max(page, 1) - 1) * per_page
+    limit = per_page + 1
+    dialect = db.session.get_bind().dialect.name
+    
+    if not term:
+        users = User.query.order_by(User.username).offset(offset).limit(limit).all()
+    elif dialect == "sqlite" and len(term) >= MIN_INDEXED_LENGTH:
+        ids = db.session.execute(
+            text(
+                "SELECT rowid FROM users_fts WHERE users_fts MATCH :phrase "
+                "ORDER BY bm25(users_fts, 3.0, 1.0, 1.0), rowid LIMIT :limit OFFSET :offset"
+            ),
+            {"phrase": _fts_phrase(term), "limit": limit, "offset": offset}
+        ).scalars().all()
+        users_by_id = {user.id: user for user in User.query.filter(User.id.in_(ids))} if ids else {}
+        users = [users_by_id[user_id] for user_id in ids if user_id in users_by_id]
+    elif dialect == "postgresql" and len(term) >= MIN_INDEXED_LENGTH:
+        users = User.query.filter(search_condition(term)).order_by(
+            func.similarity(User.username, term).desc(),
+            func.similarity(_search_document(), term).desc(),
+            User.id
+        ).offset(offset).limit(limit).all()
+    else:
+        users = User.query.filter(search_condition(term)).order_by(User.username).offset(offset).limit(limit).all()
+    
+    return users[:per_page], len(users) > per_page
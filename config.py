@@ -23,6 +23,66 @@ class Config:
     
     # Настройки для пагинации и других параметров
     ITEMS_PER_PAGE = 10
+    USERS_PER_PAGE = 50
+    
+    # Кэш отчетов по посещаемости (количество записей и время жизни в секундах)
+    REPORT_CACHE_SIZE = 256
+    REPORT_CACHE_TTL = 300
+    
+    # Кэш групп старост для проверки прав (время жизни ограничивает
+    # устаревание в других процессах)
+    GROUP_ADMIN_CACHE_SIZE = 4096
+    GROUP_ADMIN_CACHE_TTL = 60
+    
+    # Политика хеширования паролей (метод в формате werkzeug и длина соли).
+    # Хеши, посчитанные по другой политике, пересчитываются при входе
+    PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+    PASSWORD_SALT_LENGTH = 16
+    
+    # Одновременных вычислений хеша в процессе и ожидание слота в секундах
+    PASSWORD_HASH_CONCURRENCY = 2
+    PASSWORD_HASH_TIMEOUT = 5
+    
+    # Ограничение частоты запросов: лимиты по имени маршрута, хранилище
+    # корзин ("memory" или "sqlite:///путь" - общее для всех процессов)
+    # и заголовок с адресом клиента за прокси (например, 'X-Real-IP')
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_BACKEND = 'memory'
+    RATE_LIMIT_IP_HEADER = None
+    RATE_LIMITS = {
+        'auth.login': '10/minute',
+        'attendance.report': '30/minute',
+        'attendance.matrix': '30/minute',
+        'attendance.trend': '30/minute',
+        'attendance.trend_data': '30/minute',
+        'attendance.export': '5/minute',
+    }
+    
+    # Критерии группы риска: процент присутствия за семестр ниже порога
+    # (при минимальном числе отметок) или пропуски подряд
+    AT_RISK_MIN_RATE = 70
+    AT_RISK_MIN_MARKS = 5
+    AT_RISK_ABSENCE_STREAK = 3
+    
+    # Массовый импорт студентов: строк в пакете и процессов хеширования
+    # паролей (None - по числу ядер)
+    IMPORT_BATCH_SIZE = 500
+    IMPORT_HASH_WORKERS = None
+    
+    # Записей посещаемости, удаляемых одной транзакцией при каскадном удалении
+    DELETE_CHUNK_SIZE = 5000
+    
+    # Календарные ленты (.ics): часовой пояс расписания и время пар
+    CALENDAR_TIMEZONE = 'Europe/Moscow'
+    LESSON_TIMES = {
+        1: ('09:00', '10:30'),
+        2: ('10:40', '12:10'),
+        3: ('12:40', '14:10'),
+        4: ('14:20', '15:50'),
+        5: ('16:20', '17:50'),
+        6: ('18:00', '19:30'),
+        7: ('19:40', '21:10'),
+    }
 
 
 class DevelopmentConfig(Config):
@@ -39,6 +99,10 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    
+    # Быстрое хеширование для тестов
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    RATE_LIMIT_ENABLED = False
 
 
 class ProductionConfig(Config):
@@ -0,0 +1,51 @@
+"""Индексы для выборок журнала, отчета, занятий и студентов
+
+Revision ID: 0002_attendance_lessons_indexes
+Revises: 0001_initial
+Create Date: 2025-03-15 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_attendance_lessons_indexes'
+down_revision = '0001_initial'
+branch_labels = None
+depends_on = None
+
+
+# (имя индекса, таблица, столбцы)
+INDEXES = [
+    ('ix_attendance_date_student', 'attendance', ['date', 'student_id']),
+    ('ix_attendance_lesson_date', 'attendance', ['lesson_id', 'date']),
+    ('ix_attendance_student_date_status', 'attendance', ['student_id', 'date', 'status']),
+    ('ix_lessons_group_id', 'lessons', ['group_id']),
+    ('ix_lessons_subject_id', 'lessons', ['subject_id']),
+    ('ix_students_group_id', 'students', ['group_id']),
+]
+
+
+def upgrade():
+    context = op.get_context()
+    if context.dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY не блокирует запись, но не может выполняться в транзакции
+        with context.autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, if_not_exists=True,
+                                postgresql_concurrently=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    context = op.get_context()
+    if context.dialect.name == 'postgresql':
+        with context.autocommit_block():
+            for name, table, columns in reversed(INDEXES):
+                op.drop_index(name, table_name=table, if_exists=True,
+                              postgresql_concurrently=True)
+    else:
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,49 @@
+"""Дневная сводка посещаемости attendance_daily
+
+Revision ID: 0003_attendance_daily
+Revises: 0002_attendance_lessons_indexes
+Create Date: 2025-03-22 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_attendance_daily'
+down_revision = '0002_attendance_lessons_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('attendance_daily',
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('subject_id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('present', sa.Integer(), nullable=False),
+    sa.Column('absent', sa.Integer(), nullable=False),
+    sa.Column('late', sa.Integer(), nullable=False),
+    sa.Column('sick', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+    sa.ForeignKeyConstraint(['subject_id'], ['subjects.id'], ),
+    sa.PrimaryKeyConstraint('student_id', 'date', 'subject_id')
+    )
+
+    # Заполняем сводку по уже существующим записям посещаемости
+    op.execute("""
+        INSERT INTO attendance_daily (student_id, date, subject_id, total, present, absent, late, sick)
+        SELECT a.student_id, a.date, l.subject_id, COUNT(a.id),
+               SUM(CASE WHEN a.status = 'present' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN a.status = 'absent' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN a.status = 'late' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN a.status = 'sick' THEN 1 ELSE 0 END)
+        FROM attendance a
+        JOIN lessons l ON a.lesson_id = l.id
+        GROUP BY a.student_id, a.date, l.subject_id
+    """)
+
+
+def downgrade():
+    op.drop_table('attendance_daily')
@@ -0,0 +1,49 @@
+"""Группа риска: at_risk_students и очередь пересчета at_risk_queue
+
+Revision ID: 0004_at_risk_students
+Revises: 0003_attendance_daily
+Create Date: 2025-03-29 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_at_risk_students'
+down_revision = '0003_attendance_daily'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('at_risk_students',
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('semester_id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('presents', sa.Integer(), nullable=False),
+    sa.Column('presence_rate', sa.Float(), nullable=False),
+    sa.Column('absence_streak', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+    sa.PrimaryKeyConstraint('student_id')
+    )
+    op.create_index('ix_at_risk_students_presence_rate', 'at_risk_students', ['presence_rate'], unique=False)
+    # Внешний ключ на semesters создается в 0005 вместе с этой таблицей
+
+    op.create_table('at_risk_queue',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_at_risk_queue_student_id', 'at_risk_queue', ['student_id'], unique=False)
+
+    # Первый запуск пересчета обработает всех студентов
+    op.execute("INSERT INTO at_risk_queue (student_id) SELECT id FROM students")
+
+
+def downgrade():
+    op.drop_index('ix_at_risk_queue_student_id', table_name='at_risk_queue')
+    op.drop_table('at_risk_queue')
+    op.drop_index('ix_at_risk_students_presence_rate', table_name='at_risk_students')
+    op.drop_table('at_risk_students')
@@ -0,0 +1,56 @@
+"""Семестры и даты проведения занятий lesson_occurrences
+
+Revision ID: 0005_semesters_lesson_occurrences
+Revises: 0004_at_risk_students
+Create Date: 2025-04-05 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_semesters_lesson_occurrences'
+down_revision = '0004_at_risk_students'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('semesters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('first_week_type', sa.String(length=5), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('at_risk_students', schema=None) as batch_op:
+        batch_op.create_foreign_key('fk_at_risk_students_semester_id', 'semesters', ['semester_id'], ['id'])
+
+    op.create_table('lesson_occurrences',
+    sa.Column('lesson_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('semester_id', sa.Integer(), nullable=False),
+    sa.Column('lesson_number', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.ForeignKeyConstraint(['lesson_id'], ['lessons.id'], ),
+    sa.ForeignKeyConstraint(['semester_id'], ['semesters.id'], ),
+    sa.PrimaryKeyConstraint('lesson_id', 'date')
+    )
+    op.create_index('ix_lesson_occurrences_date_group', 'lesson_occurrences', ['date', 'group_id'], unique=False)
+    op.create_index('ix_lesson_occurrences_group_date', 'lesson_occurrences', ['group_id', 'date'], unique=False)
+    op.create_index('ix_lesson_occurrences_semester_id', 'lesson_occurrences', ['semester_id'], unique=False)
+
+    # Даты занятий появятся после создания семестров в разделе "Семестры"
+
+
+def downgrade():
+    op.drop_index('ix_lesson_occurrences_semester_id', table_name='lesson_occurrences')
+    op.drop_index('ix_lesson_occurrences_group_date', table_name='lesson_occurrences')
+    op.drop_index('ix_lesson_occurrences_date_group', table_name='lesson_occurrences')
+    op.drop_table('lesson_occurrences')
+    with op.batch_alter_table('at_risk_students', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_at_risk_students_semester_id', type_='foreignkey')
+    op.drop_table('semesters')
@@ -0,0 +1,36 @@
+"""Версии расписания групп schedule_versions
+
+Revision ID: 0006_schedule_versions
+Revises: 0005_semesters_lesson_occurrences
+Create Date: 2025-04-12 12:00:00.000000
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_schedule_versions'
+down_revision = '0005_semesters_lesson_occurrences'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('schedule_versions',
+    sa.Column('group_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('group_id')
+    )
+
+    # Начальная версия для существующих групп
+    op.execute(
+        sa.text("INSERT INTO schedule_versions (group_id, version, updated_at) SELECT id, 1, :now FROM groups")
+        .bindparams(now=datetime.utcnow())
+    )
+
+
+def downgrade():
+    op.drop_table('schedule_versions')
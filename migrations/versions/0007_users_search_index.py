@@ -0,0 +1,66 @@
+"""Полнотекстовый индекс пользователей (FTS5 trigram / pg_trgm)
+
+Revision ID: 0007_users_search_index
+Revises: 0006_schedule_versions
+Create Date: 2025-04-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_users_search_index'
+down_revision = '0006_schedule_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    context = op.get_context()
+    if context.dialect.name == 'sqlite':
+        # Внешняя таблица FTS5 над users, синхронизируется триггерами
+        op.execute(
+            "CREATE VIRTUAL TABLE users_fts USING fts5("
+            "username, first_name, last_name, content='users', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            "CREATE TRIGGER users_fts_ai AFTER INSERT ON users BEGIN "
+            "INSERT INTO users_fts(rowid, username, first_name, last_name) "
+            "VALUES (new.id, new.username, new.first_name, new.last_name); END"
+        )
+        op.execute(
+            "CREATE TRIGGER users_fts_ad AFTER DELETE ON users BEGIN "
+            "INSERT INTO users_fts(users_fts, rowid, username, first_name, last_name) "
+            "VALUES ('delete', old.id, old.username, old.first_name, old.last_name); END"
+        )
+        op.execute(
+            "CREATE TRIGGER users_fts_au AFTER UPDATE OF username, first_name, last_name ON users BEGIN "
+            "INSERT INTO users_fts(users_fts, rowid, username, first_name, last_name) "
+            "VALUES ('delete', old.id, old.username, old.first_name, old.last_name); "
+            "INSERT INTO users_fts(rowid, username, first_name, last_name) "
+            "VALUES (new.id, new.username, new.first_name, new.last_name); END"
+        )
+        op.execute("INSERT INTO users_fts(users_fts) VALUES ('rebuild')")
+    elif context.dialect.name == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # CREATE INDEX CONCURRENTLY не блокирует запись, но не может выполняться в транзакции
+        with context.autocommit_block():
+            op.create_index(
+                'ix_users_search_trgm', 'users',
+                [sa.text("(coalesce(username, '') || ' ' || coalesce(first_name, '') || ' ' || coalesce(last_name, '')) gin_trgm_ops")],
+                postgresql_using='gin', if_not_exists=True, postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    context = op.get_context()
+    if context.dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS users_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS users_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS users_fts_ai")
+        op.execute("DROP TABLE IF EXISTS users_fts")
+    elif context.dialect.name == 'postgresql':
+        with context.autocommit_block():
+            op.drop_index('ix_users_search_trgm', table_name='users', if_exists=True,
+                          postgresql_concurrently=True)
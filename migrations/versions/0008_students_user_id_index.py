@@ -0,0 +1,37 @@
+"""Индекс students.user_id для выбора свободных пользователей
+
+Revision ID: 0008_students_user_id_index
+Revises: 0007_users_search_index
+Create Date: 2025-04-26 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_students_user_id_index'
+down_revision = '0007_users_search_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    context = op.get_context()
+    if context.dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY не блокирует запись, но не может выполняться в транзакции
+        with context.autocommit_block():
+            op.create_index('ix_students_user_id', 'students', ['user_id'], unique=False,
+                            if_not_exists=True, postgresql_concurrently=True)
+    else:
+        op.create_index('ix_students_user_id', 'students', ['user_id'], unique=False,
+                        if_not_exists=True)
+
+
+def downgrade():
+    context = op.get_context()
+    if context.dialect.name == 'postgresql':
+        with context.autocommit_block():
+            op.drop_index('ix_students_user_id', table_name='students', if_exists=True,
+                          postgresql_concurrently=True)
+    else:
+        op.drop_index('ix_students_user_id', table_name='students', if_exists=True)
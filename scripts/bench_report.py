@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Микробенчмарк накладных расходов на запрос отчета по посещаемости.
+Сравнивает прежнюю сборку SQL-строки через text() с запросом на SQLAlchemy Core,
+для которого работает кэш скомпилированных запросов.
+Запуск: python scripts/bench_report.py [количество повторов]
+"""
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# Добавляем корневую папку проекта в sys.path для импорта модулей
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from config import TestingConfig
+from app import create_app, db
+from app.routes.attendance import _report_rows
+from check_query_count import fill_journal
+
+# Комбинации фильтров (group_id, subject_id, student_id), которые перебираются по кругу
+FILTERS = [
+    (None, None, None),
+    (1, None, None),
+    (1, 1, None),
+    (1, None, 2),
+]
+
+
+def text_report(start_date, end_date, group_id, subject_id, student_id):
+    """
+    Прежний способ: SQL собирается строкой и разбирается заново на каждый запрос.
+    """
+    subject_condition = " AND r.subject_id = :subject_id" if subject_id else ""
+    query = f"""
+        SELECT s.id as student_id, u.first_name, u.last_name, g.name as group_name,
+               COALESCE(SUM(r.total), 0) as total,
+               COALESCE(SUM(r.present), 0) as presents
+        FROM students s
+        JOIN users u ON s.user_id = u.id
+        JOIN groups g ON s.group_id = g.id
+        LEFT JOIN attendance_daily r ON s.id = r.student_id
+            AND r.date BETWEEN :start_date AND :end_date{subject_condition}
+    """
+    params = {"start_date": start_date, "end_date": end_date}
+    if subject_id:
+        params["subject_id"] = subject_id
+    if group_id:
+        query += " WHERE s.group_id = :group_id"
+        params["group_id"] = group_id
+    if student_id:
+        query += (" AND" if "WHERE" in query else " WHERE") + " s.id = :student_id"
+        params["student_id"] = student_id
+    query += " GROUP BY s.id, u.first_name, u.last_name, g.name"
+    return db.session.execute(text(query), params).all()
+
+
+def core_report(start_date, end_date, group_id, subject_id, student_id):
+    """
+    Новый способ: заранее собранный запрос на Core со связанными параметрами.
+    """
+    return _report_rows(start_date, end_date, group_id, subject_id, student_id)
+
+
+def measure(function, repeats, start_date, end_date):
+    """
+    Измеряет среднее время одного вызова в микросекундах.
+    """
+    # Прогрев: первый вызов каждой комбинации компилирует запрос
+    for filters in FILTERS:
+        function(start_date, end_date, *filters)
+    
+    started = time.perf_counter()
+    for number in range(repeats):
+        function(start_date, end_date, *FILTERS[number % len(FILTERS)])
+    return (time.perf_counter() - started) / repeats * 1e6
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        fill_journal(5, days=3)
+        
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=30)
+        
+        for filters in FILTERS:
+            assert text_report(start_date, end_date, *filters) == core_report(start_date, end_date, *filters)
+        
+        before = measure(text_report, repeats, start_date, end_date)
+        after = measure(core_report, repeats, start_date, end_date)
+        
+        print(f"Повторов: {repeats}")
+        print(f"text() со сборкой строки: {before:.1f} мкс на запрос")
+        print(f"Core с кэшем компиляции:  {after:.1f} мкс на запрос")
@@ -31,11 +31,15 @@ def check_database():
             print(f"  - {role}: {count}")
         
         # Группы
-        groups = Group.query.all()
+        # Количество студентов по группам одним запросом с группировкой
+        groups = db.session.query(
+            Group.name, Group.specialty, db.func.count(Student.id)
+        ).outerjoin(
+            Student, Student.group_id == Group.id
+        ).group_by(Group.id, Group.name, Group.specialty).order_by(Group.name).all()
         print(f"Групп: {len(groups)}")
-        for group in groups:
-            student_count = Student.query.filter_by(group_id=group.id).count()
-            print(f"  - {group.name} ({group.specialty}): {student_count} студентов")
+        for name, specialty, student_count in groups:
+            print(f"  - {name} ({specialty}): {student_count} студентов")
         
         # Студенты
         students = Student.query.all()
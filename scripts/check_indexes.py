@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Скрипт для проверки, что запросы журнала и отчета по посещаемости используют индексы.
+Выполняет страницы и фоновые пересчеты в тестовой базе SQLite и проверяет
+план каждого запроса через EXPLAIN QUERY PLAN.
+Запуск: python scripts/check_indexes.py
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Добавляем корневую папку проекта в sys.path для импорта модулей
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import TestingConfig
+from app import create_app, db
+from app.models.semester import Semester
+from app.utils.query_counter import count_queries
+from app.utils.rollup import refresh_rollup
+from app.utils.at_risk import refresh_at_risk
+from check_query_count import fill_journal
+
+# Страница и индексы, которые должны встретиться в планах ее запросов к attendance
+EXPECTED_INDEXES = [
+    ("/attendance/", ["ix_attendance_date_student"]),
+    ("/attendance/?subject_id=1", ["ix_attendance_lesson_date"]),
+    # Отчет читает сводку attendance_daily по ее первичному ключу (student_id, date, subject_id)
+    ("/attendance/report", ["sqlite_autoindex_attendance_daily_1"]),
+    ("/attendance/report?group_id=1", ["ix_students_group_id", "sqlite_autoindex_attendance_daily_1"]),
+]
+
+# Фоновые пересчеты и индексы, которые должны встретиться в планах их запросов к attendance
+EXPECTED_TASK_INDEXES = [
+    # Серия пропусков группы риска читает отметки студентов по датам и статусу
+    ("refresh_at_risk", lambda: refresh_at_risk(full=True), ["ix_attendance_student_date_status"]),
+    # Сводка после изменения отметок пересчитывается по студентам
+    ("refresh_rollup(student_ids)", lambda: refresh_rollup(student_ids=[1, 2], subject_id=1),
+     ["ix_attendance_student_date_status"]),
+]
+
+
+def query_plans(client, url):
+    """
+    Выполняет страницу и возвращает планы ее запросов, затрагивающих посещаемость.
+    
+    Args:
+        client: Тестовый клиент Flask
+        url (str): Адрес страницы
+        
+    Returns:
+        list: Строки планов запросов
+    """
+    with count_queries() as counter:
+        response = client.get(url)
+    assert response.status_code == 200, (url, response.status_code)
+    return attendance_plans(counter)
+
+
+def attendance_plans(counter):
+    """
+    Возвращает планы записанных запросов, затрагивающих посещаемость.
+    
+    Args:
+        counter: Счетчик запросов с записанными запросами и параметрами
+        
+    Returns:
+        list: Строки планов запросов
+    """
+    plans = []
+    connection = db.session.connection()
+    for statement, parameters in zip(counter.statements, counter.parameters):
+        if "attendance" not in statement:
+            continue
+        plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        plans.extend(row[-1] for row in plan)
+    return plans
+
+
+def check_indexes():
+    """
+    Проверяет использование индексов и выводит результат.
+    
+    Returns:
+        bool: True если все ожидаемые индексы используются
+    """
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        fill_journal(20)
+        today = datetime.now().date()
+        db.session.add(Semester("Текущий", today - timedelta(days=60), today + timedelta(days=60)))
+        db.session.commit()
+        
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["user_id"] = 1
+            sess["user_role"] = "admin"
+        
+        success = True
+        for url, indexes in EXPECTED_INDEXES:
+            plans = query_plans(client, url)
+            for index in indexes:
+                used = any(index in line for line in plans)
+                print(f"{'OK ' if used else 'НЕТ'} {url}: {index}")
+                if not used:
+                    success = False
+                    for line in plans:
+                        print(f"      {line}")
+        
+        for name, task, indexes in EXPECTED_TASK_INDEXES:
+            with count_queries() as counter:
+                task()
+            plans = attendance_plans(counter)
+            db.session.rollback()
+            for index in indexes:
+                used = any(index in line for line in plans)
+                print(f"{'OK ' if used else 'НЕТ'} {name}: {index}")
+                if not used:
+                    success = False
+                    for line in plans:
+                        print(f"      {line}")
+        return success
+
+
+if __name__ == "__main__":
+    if not check_indexes():
+        print("Ошибка: запросы не используют ожидаемые индексы")
+        sys.exit(1)
+    print("Все запросы используют индексы")
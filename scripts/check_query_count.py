@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Скрипт для проверки, что количество SQL-запросов журнала посещаемости
+не зависит от количества отображаемых строк.
+Запуск: python scripts/check_query_count.py
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Добавляем корневую папку проекта в sys.path для импорта модулей
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import TestingConfig
+from app import create_app, db
+from app.models.user import User
+from app.models.group import Group
+from app.models.student import Student
+from app.models.subject import Subject
+from app.models.lesson import Lesson
+from app.models.attendance import Attendance
+from app.utils.query_counter import count_queries
+from app.utils.rollup import rebuild_rollup
+
+
+def fill_journal(students_count, days=10):
+    """
+    Заполняет пустую базу данными для журнала.
+    
+    Args:
+        students_count (int): Количество студентов в группе
+        days (int): Количество дней с посещаемостью
+    """
+    admin = User(username="admin", password="admin", role="admin")
+    group = Group(name="ИС-11", study_year=1)
+    subject = Subject(name="Программирование")
+    db.session.add_all([admin, group, subject])
+    db.session.flush()
+    
+    lesson = Lesson(subject_id=subject.id, group_id=group.id, lesson_type="Лекция",
+                    week_type="Обе", day_of_week="Пн", lesson_number=1)
+    db.session.add(lesson)
+    db.session.flush()
+    
+    today = datetime.now().date()
+    for i in range(students_count):
+        user = User(username=f"user{i}", password="password", role="student")
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, group_id=group.id)
+        db.session.add(student)
+        db.session.flush()
+        for day in range(days):
+            db.session.add(Attendance(lesson_id=lesson.id, student_id=student.id,
+                                      date=today - timedelta(days=day), status="present"))
+    db.session.commit()
+    rebuild_rollup()
+
+
+def journal_query_count(students_count):
+    """
+    Считает запросы, выполняемые при открытии журнала администратором.
+    
+    Args:
+        students_count (int): Количество студентов в группе
+        
+    Returns:
+        int: Количество SQL-запросов
+    """
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        fill_journal(students_count)
+        
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["user_id"] = 1
+            sess["user_role"] = "admin"
+        
+        with count_queries() as counter:
+            response = client.get("/attendance/")
+        assert response.status_code == 200, response.status_code
+        return counter.count
+
+
+if __name__ == "__main__":
+    small = journal_query_count(2)
+    large = journal_query_count(50)
+    print(f"Запросов для 2 студентов: {small}")
+    print(f"Запросов для 50 студентов: {large}")
+    if small != large:
+        print("Ошибка: количество запросов зависит от количества строк")
+        sys.exit(1)
+    print("Количество запросов постоянно")
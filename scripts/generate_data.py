@@ -0,0 +1,477 @@
+#!/usr/bin/env python
+"""
+Генератор синтетических данных для нагрузочного тестирования.
+
+Создает факультеты (специальности групп), группы, студентов, расписание,
+семестры и посещаемость по заданным параметрам. Данные вставляются
+пакетными запросами: уникальность логинов и названий проверяется по
+множествам в памяти, а не запросом на каждую строку, пароль всех
+студентов хешируется один раз.
+
+Запуск: python scripts/generate_data.py [--faculties 4] [--groups-per-faculty 10]
+        [--students-per-group 25] [--lessons-per-week 15] [--semesters 2]
+        [--statuses present=70,absent=15,late=10,sick=5] [--seed 1] [--reset]
+
+Пример набора около 10 млн записей посещаемости (несколько минут на SQLite):
+python scripts/generate_data.py --reset --faculties 15 --groups-per-faculty 25 \\
+    --students-per-group 25 --lessons-per-week 18 --semesters 4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime
+
+# Добавляем корневую папку проекта в sys.path для импорта модулей
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select, insert, func
+from app import create_app, db
+from app.models.attendance import Attendance
+from app.models.group import Group
+from app.models.lesson import Lesson
+from app.models.lesson_occurrence import LessonOccurrence
+from app.models.semester import Semester
+from app.models.student import Student
+from app.models.subject import Subject
+from app.models.user import User
+from app.utils.at_risk import refresh_at_risk
+from app.utils.occurrences import regenerate_occurrences
+from app.utils.passwords import hash_password
+from app.utils.rollup import rebuild_rollup
+from app.utils.schedule import schedule_changed
+
+FIRST_NAMES = [
+    "Александр", "Алексей", "Анна", "Анастасия", "Андрей", "Дарья", "Дмитрий",
+    "Екатерина", "Елена", "Иван", "Ирина", "Кирилл", "Мария", "Максим",
+    "Михаил", "Наталья", "Никита", "Ольга", "Павел", "Полина", "Сергей",
+    "София", "Татьяна", "Юлия",
+]
+LAST_NAMES = [
+    "Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов",
+    "Михайлов", "Новиков", "Федоров", "Морозов", "Волков", "Алексеев",
+    "Лебедев", "Семенов", "Егоров", "Павлов", "Козлов", "Степанов", "Николаев",
+]
+SUBJECT_NAMES = [
+    "Математический анализ", "Программирование", "Базы данных",
+    "Операционные системы", "Сети и телекоммуникации", "Физика",
+    "Дискретная математика", "Алгоритмы и структуры данных", "Иностранный язык",
+    "Философия", "Экономика", "Теория вероятностей",
+]
+
+# Доля занятий каждого типа недели в генерируемом расписании
+WEEK_TYPE_WEIGHTS = {"Обе": 4, "Чет": 1, "Нечет": 1}
+
+
+def parse_statuses(value):
+    """
+    Разбирает распределение статусов посещения.
+    
+    Args:
+        value (str): Строка вида "present=70,absent=15,late=10,sick=5"
+    
+    Returns:
+        tuple: (статусы, веса)
+    """
+    statuses, weights = [], []
+    try:
+        for part in value.split(","):
+            status, weight = part.split("=")
+            status = status.strip()
+            if status not in Attendance.STATUSES:
+                raise ValueError(status)
+            statuses.append(status)
+            weights.append(float(weight))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"ожидается список статус=вес из {', '.join(Attendance.STATUSES)}"
+        )
+    if sum(weights) <= 0:
+        raise argparse.ArgumentTypeError("сумма весов должна быть больше нуля")
+    return statuses, weights
+
+
+def _unique(name, taken):
+    """
+    Возвращает имя, которого нет среди занятых, и помечает его занятым.
+    
+    Args:
+        name (str): Желаемое имя
+        taken (set): Занятые имена
+    
+    Returns:
+        str: Свободное имя (с числовым суффиксом при совпадении)
+    """
+    candidate, number = name, 1
+    while candidate in taken:
+        number += 1
+        candidate = f"{name}-{number}"
+    taken.add(candidate)
+    return candidate
+
+
+def _max_id(model):
+    """
+    Возвращает наибольший идентификатор таблицы.
+    
+    Строки, вставленные генератором, выбираются обратно по условию id > этого
+    значения одним запросом.
+    
+    Args:
+        model: Модель таблицы
+    
+    Returns:
+        int: Идентификатор или 0 для пустой таблицы
+    """
+    return db.session.scalar(select(func.max(model.id))) or 0
+
+
+def _insert(model, rows, batch_size):
+    """
+    Вставляет строки пакетами без загрузки объектов модели.
+    
+    Args:
+        model: Модель таблицы
+        rows (list): Словари значений колонок
+        batch_size (int): Строк в одном запросе
+    """
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(insert(model), rows[start:start + batch_size])
+
+
+def _semester_periods(count):
+    """
+    Перечисляет периоды последних семестров по обычному учебному календарю
+    (весна - февраль-июнь, осень - сентябрь-январь), начиная с последнего
+    начавшегося.
+    
+    Args:
+        count (int): Количество семестров
+    
+    Returns:
+        list: Кортежи (название, начало, конец) от новых к старым
+    """
+    today = datetime.now().date()
+    if today.month >= 9:
+        year, autumn = today.year, True
+    elif today.month == 1:
+        year, autumn = today.year - 1, True
+    else:
+        year, autumn = today.year, False
+    periods = []
+    while len(periods) < count:
+        if autumn:
+            periods.append((f"Осень {year}", date(year, 9, 1), date(year + 1, 1, 31)))
+        else:
+            periods.append((f"Весна {year}", date(year, 2, 1), date(year, 6, 30)))
+            year -= 1
+        autumn = not autumn
+    return periods
+
+
+def create_semesters(count):
+    """
+    Подбирает семестры для генерации посещаемости.
+    
+    Семестры, заданные администратором, не меняются: если период
+    пересекается с существующими семестрами, используются они, а новый
+    семестр создается только на свободном периоде - так же, как форма
+    семестров запрещает пересечения.
+    
+    Args:
+        count (int): Количество семестров
+    
+    Returns:
+        list: Идентификаторы семестров
+    """
+    semester_ids = []
+    for name, start_date, end_date in _semester_periods(count):
+        existing = Semester.overlapping(start_date, end_date).all()
+        if existing:
+            semester_ids.extend(semester.id for semester in existing if semester.id not in semester_ids)
+            continue
+        semester = Semester(name, start_date, end_date)
+        db.session.add(semester)
+        db.session.flush()
+        semester_ids.append(semester.id)
+    db.session.commit()
+    return semester_ids
+
+
+def create_subjects(count):
+    """
+    Создает предметы.
+    
+    Args:
+        count (int): Количество предметов
+    
+    Returns:
+        list: Идентификаторы предметов
+    """
+    taken = set(db.session.scalars(select(Subject.name)))
+    first_id = _max_id(Subject)
+    rows = []
+    for number in range(count):
+        name = SUBJECT_NAMES[number % len(SUBJECT_NAMES)]
+        if number >= len(SUBJECT_NAMES):
+            name = f"{name} {number // len(SUBJECT_NAMES) + 1}"
+        rows.append(dict(name=_unique(name, taken)))
+    db.session.execute(insert(Subject), rows)
+    db.session.commit()
+    return db.session.scalars(select(Subject.id).where(Subject.id > first_id).order_by(Subject.id)).all()
+
+
+def create_groups(faculties, groups_per_faculty):
+    """
+    Создает группы; факультет записывается в специальность группы.
+    
+    Args:
+        faculties (int): Количество факультетов
+        groups_per_faculty (int): Групп на факультете
+    
+    Returns:
+        list: Строки (id, name)
+    """
+    taken = set(db.session.scalars(select(Group.name)))
+    first_id = _max_id(Group)
+    rows = []
+    for faculty in range(1, faculties + 1):
+        for number in range(groups_per_faculty):
+            study_year = number % 4 + 1
+            rows.append(dict(
+                name=_unique(f"Ф{faculty}-{study_year}{number // 4 + 1:02d}", taken),
+                study_year=study_year,
+                specialty=f"Факультет {faculty}"
+            ))
+    db.session.execute(insert(Group), rows)
+    db.session.commit()
+    return db.session.execute(select(Group.id, Group.name).where(Group.id > first_id).order_by(Group.id)).all()
+
+
+def create_students(groups, students_per_group, password, rnd, batch_size):
+    """
+    Создает пользователей и студентов групп; первый студент группы - староста.
+    
+    Args:
+        groups (list): Строки групп (id, name)
+        students_per_group (int): Студентов в группе
+        password (str): Пароль всех студентов
+        rnd (random.Random): Генератор случайных чисел
+        batch_size (int): Строк в одном запросе
+    
+    Returns:
+        dict: Идентификатор группы -> список идентификаторов студентов
+    """
+    # Хеш считается один раз: в хеше тот же пароль и соль у всех студентов
+    password_hash = hash_password(password)
+    taken = set(db.session.scalars(select(User.username)))
+    first_user_id = _max_id(User)
+    first_student_id = _max_id(Student)
+    
+    users = []
+    memberships = []
+    number = 0
+    for group in groups:
+        for position in range(students_per_group):
+            number += 1
+            username = _unique(f"student{number:07d}", taken)
+            users.append(dict(
+                username=username,
+                password=password_hash,
+                role="student",
+                first_name=rnd.choice(FIRST_NAMES),
+                last_name=rnd.choice(LAST_NAMES)
+            ))
+            memberships.append((username, group.id, position == 0))
+    _insert(User, users, batch_size)
+    
+    user_ids = dict(db.session.execute(select(User.username, User.id).where(User.id > first_user_id)).all())
+    _insert(Student, [
+        dict(user_id=user_ids[username], group_id=group_id, is_group_admin=is_group_admin)
+        for username, group_id, is_group_admin in memberships
+    ], batch_size)
+    db.session.commit()
+    
+    students = {group.id: [] for group in groups}
+    for student_id, group_id in db.session.execute(
+        select(Student.id, Student.group_id).where(Student.id > first_student_id).order_by(Student.id)
+    ):
+        students[group_id].append(student_id)
+    return students
+
+
+def create_lessons(groups, subject_ids, lessons_per_week, rnd):
+    """
+    Создает недельное расписание групп без пересечений по дню и номеру пары.
+    
+    Args:
+        groups (list): Строки групп (id, name)
+        subject_ids (list): Идентификаторы предметов
+        lessons_per_week (int): Занятий в неделю у группы
+        rnd (random.Random): Генератор случайных чисел
+    
+    Returns:
+        list: Идентификаторы занятий
+    """
+    slots = [(day, number) for day in Lesson.DAYS_OF_WEEK for number in range(1, 8)]
+    week_types, week_weights = zip(*WEEK_TYPE_WEIGHTS.items())
+    first_id = _max_id(Lesson)
+    rows = []
+    for group in groups:
+        for day, number in rnd.sample(slots, lessons_per_week):
+            rows.append(dict(
+                subject_id=rnd.choice(subject_ids),
+                group_id=group.id,
+                lesson_type=rnd.choice(Lesson.LESSON_TYPES),
+                week_type=rnd.choices(week_types, week_weights)[0],
+                day_of_week=day,
+                lesson_number=number
+            ))
+    db.session.execute(insert(Lesson), rows)
+    db.session.commit()
+    return db.session.scalars(select(Lesson.id).where(Lesson.id > first_id).order_by(Lesson.id)).all()
+
+
+def create_attendance(students, lesson_ids, semester_ids, statuses, weights, rnd, batch_size):
+    """
+    Отмечает всех студентов группы на каждом прошедшем занятии семестров.
+    
+    Даты берутся из lesson_occurrences, поэтому совпадают с расписанием,
+    которое видит приложение. Каждая пара (занятие, дата) обходится один
+    раз, так что записи уникальны без проверки по базе.
+    
+    Args:
+        students (dict): Идентификатор группы -> идентификаторы студентов
+        lesson_ids (list): Идентификаторы созданных занятий
+        semester_ids (list): Идентификаторы семестров
+        statuses (list): Статусы посещения
+        weights (list): Веса статусов
+        rnd (random.Random): Генератор случайных чисел
+        batch_size (int): Строк в одном запросе
+    
+    Returns:
+        int: Количество созданных записей
+    """
+    today = datetime.now().date()
+    occurrences = db.session.execute(
+        select(LessonOccurrence.lesson_id, LessonOccurrence.group_id, LessonOccurrence.date).where(
+            LessonOccurrence.lesson_id.between(lesson_ids[0], lesson_ids[-1]),
+            LessonOccurrence.semester_id.in_(semester_ids),
+            LessonOccurrence.date <= today
+        ).order_by(LessonOccurrence.date, LessonOccurrence.lesson_id)
+    ).all()
+    
+    cum_weights = []
+    for weight in weights:
+        cum_weights.append(weight + (cum_weights[-1] if cum_weights else 0))
+    
+    created = 0
+    rows = []
+    started = time.perf_counter()
+    for occurrence in occurrences:
+        group_students = students.get(occurrence.group_id, [])
+        for student_id, status in zip(
+            group_students, rnd.choices(statuses, cum_weights=cum_weights, k=len(group_students))
+        ):
+            rows.append(dict(
+                lesson_id=occurrence.lesson_id,
+                student_id=student_id,
+                date=occurrence.date,
+                status=status
+            ))
+        if len(rows) >= batch_size:
+            db.session.execute(insert(Attendance), rows)
+            db.session.commit()
+            created += len(rows)
+            rows = []
+            rate = created / (time.perf_counter() - started)
+            print(f"  посещаемость: {created} записей ({rate:.0f} в секунду)")
+    if rows:
+        db.session.execute(insert(Attendance), rows)
+        db.session.commit()
+        created += len(rows)
+    return created
+
+
+def generate(args):
+    """
+    Создает набор данных по параметрам командной строки.
+    
+    Args:
+        args (argparse.Namespace): Параметры генерации
+    """
+    rnd = random.Random(args.seed)
+    statuses, weights = args.statuses
+    started = time.perf_counter()
+    
+    if args.reset:
+        print("Пересоздание таблиц...")
+        db.drop_all()
+        db.create_all()
+    if db.session.scalar(select(func.count()).select_from(User).where(User.role == "admin")) == 0:
+        db.session.add(User("admin", args.password, "admin", "Администратор", "Системы"))
+        db.session.commit()
+    
+    semester_ids = create_semesters(args.semesters)
+    subject_ids = create_subjects(args.subjects)
+    groups = create_groups(args.faculties, args.groups_per_faculty)
+    print(f"Семестров: {len(semester_ids)}, предметов: {len(subject_ids)}, групп: {len(groups)}")
+    
+    students = create_students(groups, args.students_per_group, args.password, rnd, args.batch_size)
+    print(f"Студентов: {sum(len(ids) for ids in students.values())}")
+    
+    lesson_ids = create_lessons(groups, subject_ids, args.lessons_per_week, rnd)
+    occurrences = regenerate_occurrences(lesson_ids=lesson_ids)
+    schedule_changed()
+    db.session.commit()
+    print(f"Занятий в расписании: {len(lesson_ids)}, дат занятий: {occurrences}")
+    
+    created = create_attendance(students, lesson_ids, semester_ids, statuses, weights, rnd, args.batch_size)
+    print(f"Записей посещаемости: {created}")
+    
+    print("Пересчет сводки и группы риска...")
+    rebuild_rollup()
+    refresh_at_risk()
+    print(f"Готово за {time.perf_counter() - started:.1f} с")
+
+
+def parse_args(argv=None):
+    """
+    Разбирает параметры командной строки.
+    
+    Args:
+        argv (list, optional): Аргументы (по умолчанию sys.argv)
+    
+    Returns:
+        argparse.Namespace: Параметры генерации
+    """
+    parser = argparse.ArgumentParser(description="Генератор синтетических данных для нагрузочного тестирования")
+    parser.add_argument("--faculties", type=int, default=4, help="количество факультетов")
+    parser.add_argument("--groups-per-faculty", type=int, default=10, help="групп на факультете")
+    parser.add_argument("--students-per-group", type=int, default=25, help="студентов в группе")
+    parser.add_argument("--subjects", type=int, default=12, help="количество предметов")
+    parser.add_argument("--lessons-per-week", type=int, default=15,
+                        help="занятий в неделю у группы (не больше 42)")
+    parser.add_argument("--semesters", type=int, default=2, help="семестров, начиная с текущего")
+    parser.add_argument("--statuses", type=parse_statuses, default="present=70,absent=15,late=10,sick=5",
+                        help="распределение статусов посещения, например present=70,absent=15,late=10,sick=5")
+    parser.add_argument("--seed", type=int, default=1, help="начальное значение генератора случайных чисел")
+    parser.add_argument("--password", default="password", help="пароль студентов и администратора")
+    parser.add_argument("--batch-size", type=int, default=20000, help="строк в одном запросе вставки")
+    parser.add_argument("--reset", action="store_true", help="пересоздать таблицы перед генерацией")
+    args = parser.parse_args(argv)
+    
+    if not 1 <= args.lessons_per_week <= len(Lesson.DAYS_OF_WEEK) * 7:
+        parser.error("--lessons-per-week должно быть от 1 до 42")
+    for name in ("faculties", "groups_per_faculty", "students_per_group", "subjects", "semesters", "batch_size"):
+        if getattr(args, name) < 1:
+            parser.error(f"--{name.replace('_', '-')} должно быть положительным")
+    return args
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    app = create_app()
+    with app.app_context():
+        generate(arguments)
@@ -18,6 +18,16 @@ from app.models.student import Student
 from app.models.subject import Subject
 from app.models.lesson import Lesson
 from app.models.attendance import Attendance
+from app.models.attendance_daily import AttendanceDaily
+from app.models.at_risk_queue import AtRiskQueue
+from app.models.at_risk_student import AtRiskStudent
+from app.models.lesson_occurrence import LessonOccurrence
+from app.models.schedule_version import ScheduleVersion
+from app.models.semester import Semester
+from app.utils.rollup import rebuild_rollup
+from app.utils.occurrences import regenerate_occurrences
+from app.utils.schedule import schedule_changed
+from app.utils.at_risk import refresh_at_risk
 
 
 def clear_tables():
@@ -25,10 +35,16 @@ def clear_tables():
     print("Очистка таблиц...")
     
     # Очищаем таблицы в правильном порядке, чтобы избежать проблем с внешними ключами
+    AtRiskStudent.query.delete()
+    AtRiskQueue.query.delete()
+    AttendanceDaily.query.delete()
     Attendance.query.delete()
+    LessonOccurrence.query.delete()
     Student.query.delete()
     Lesson.query.delete()
+    Semester.query.delete()
     Subject.query.delete()
+    ScheduleVersion.query.delete()
     Group.query.delete()
     User.query.delete()
     
@@ -141,19 +157,34 @@ def seed_data():
     db.session.commit()
     print(f"Создано {len(lessons)} занятий")
     
-    # Посещаемость
-    print("Создание записей о посещаемости...")
-    attendances = []
-    
     # Генерируем посещаемость за последний месяц
     today = datetime.now().date()
     start_date = today - timedelta(days=30)
     
+    # Семестр, покрывающий даты посещаемости: по нему строятся даты занятий,
+    # непроставленные отметки, динамика и группа риска
+    print("Создание семестра...")
+    end_date = today + timedelta(days=90)
+    if Semester.overlapping(start_date, end_date).count():
+        print("Семестр на этот период уже задан")
+    else:
+        db.session.add(Semester(name="Текущий семестр", start_date=start_date, end_date=end_date))
+    regenerate_occurrences(lesson_ids=[lesson.id for lesson in lessons])
+    schedule_changed()
+    db.session.commit()
+    
+    # Посещаемость
+    print("Создание записей о посещаемости...")
+    attendances = []
+    
     # Статусы посещения
     statuses = ["present", "absent", "late", "sick"]
     # Вероятности для каждого статуса (present: 70%, absent: 10%, late: 10%, sick: 10%)
     status_weights = [0.7, 0.1, 0.1, 0.1]
     
+    # Уже созданные записи (занятие, студент, дата) - вместо запроса к базе на каждую
+    seen = set()
+    
     # Для каждого занятия
     for lesson in lessons:
         # Для каждого студента в группе урока
@@ -167,14 +198,10 @@ def seed_data():
                 # Случайный статус с учетом весов
                 status = random.choices(statuses, weights=status_weights)[0]
                 
-                # Проверяем, не существует ли уже такая запись
-                existing = Attendance.query.filter_by(
-                    lesson_id=lesson.id,
-                    student_id=student.id,
-                    date=date
-                ).first()
-                
-                if not existing:
+                # Проверяем, не создана ли уже такая запись
+                key = (lesson.id, student.id, date)
+                if key not in seen:
+                    seen.add(key)
                     attendance = Attendance(
                         lesson_id=lesson.id,
                         student_id=student.id,
@@ -188,6 +215,10 @@ def seed_data():
     
     db.session.commit()
     print(f"Создано {len(attendances)} записей о посещаемости")
+    
+    # Сводка посещаемости для отчетов и список группы риска
+    rebuild_rollup()
+    refresh_at_risk(full=True)
     print("База данных успешно заполнена тестовыми данными!")
 
 